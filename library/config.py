@@ -19,11 +19,11 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 import os
-import queue
 import sys
 
 import yaml
 
+from library.lcd.update_queue import DROP_OLDEST, UpdateQueue
 from library.log import logger
 
 
@@ -38,6 +38,10 @@ CONFIG_DATA = load_yaml("config.yaml")
 THEME_DEFAULT = load_yaml("res/themes/default.yaml")
 THEME_DATA = None
 
+# Paths of the theme STATS sections displaying at least one element, e.g. ('MEMORY',), ('MEMORY', 'SWAP'),
+# ('MEMORY', 'SWAP', 'GRAPH'). Computed when the theme is loaded
+SHOWN_STATS = set()
+
 
 def copy_default(default, theme):
     """recursively supply default values into a dict of dicts of dicts ...."""
@@ -48,8 +52,25 @@ def copy_default(default, theme):
             copy_default(default[k], theme[k])
 
 
+def shown_sections(theme_data, path=()):
+    """return the paths of all sections of theme_data with SHOW set in them or in any of their subsections"""
+    shown = set()
+    for k, v in theme_data.items():
+        if type(v) == type({}):
+            sub_shown = shown_sections(v, path + (k,))
+            if sub_shown or v.get("SHOW", False):
+                shown |= sub_shown
+                shown.add(path + (k,))
+    return shown
+
+
+def is_shown(*path):
+    """return True if the theme displays an element of this STATS section, e.g. is_shown('MEMORY', 'SWAP')"""
+    return path in SHOWN_STATS
+
+
 def load_theme():
-    global THEME_DATA
+    global THEME_DATA, SHOWN_STATS
     try:
         theme_path = "res/themes/" + CONFIG_DATA['config']['THEME'] + "/"
         logger.info("Loading theme %s from %s" % (CONFIG_DATA['config']['THEME'], theme_path + "theme.yaml"))
@@ -64,9 +85,13 @@ def load_theme():
 
     copy_default(THEME_DEFAULT, THEME_DATA)
 
+    # Only the metrics displayed by the theme are read from the sensors
+    SHOWN_STATS = shown_sections(THEME_DATA['STATS'])
+
 
 # Load theme on import
 load_theme()
 
-# Queue containing the serial requests to send to the screen
-update_queue = queue.Queue()
+# Queue containing the serial requests to send to the screen, limited to an amount of pending data
+update_queue = UpdateQueue(max_bytes=CONFIG_DATA["display"].get("QUEUE_MAX_BYTES", 0),
+                           policy=CONFIG_DATA["display"].get("QUEUE_FULL_POLICY", DROP_OLDEST))
@@ -75,6 +75,9 @@ class Display:
         else:
             logger.error("Unknown display revision '", config.CONFIG_DATA["display"]["REVISION"], "'")
 
+        if self.lcd:
+            self.lcd.max_write_size = config.CONFIG_DATA["display"].get("MAX_WRITE_SIZE", self.lcd.max_write_size)
+
     def initialize_display(self):
         # Reset screen in case it was in an unstable state (screen is also cleared)
         self.lcd.Reset()
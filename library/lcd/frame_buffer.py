@@ -0,0 +1,174 @@
+# turing-smart-screen-python - a Python system monitor and library for 3.5" USB-C displays like Turing Smart Screen or XuanFang
+# https://github.com/mathoudebine/turing-smart-screen-python/
+
+# Copyright (C) 2021-2023  Matthieu Houdebine (mathoudebine)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# This file defines a shadow copy of the display content, used to only send the pixels that actually changed
+# Changes are tracked by tiles, then adjacent changed tiles are merged in as few rectangles as possible before sending
+
+import threading
+from typing import List, Optional, Tuple
+
+from PIL import Image, ImageChops
+
+# Size in pixels of the square tiles used to track changed areas
+TILE_SIZE = 16
+
+# Fixed cost (in bytes) of each separate bitmap transfer on top of its command: serial write, USB transfer and display
+# processing latencies. Sending a few more pixels is often cheaper than sending one more bitmap command
+TRANSFER_OVERHEAD = 512
+
+# Above this number of changed areas, they are all sent as a single rectangle
+MAX_CHANGED_AREAS = 32
+
+
+def _intersects(a: Tuple[int, int, int, int], b: Tuple[int, int, int, int]) -> bool:
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def _contains(a: Tuple[int, int, int, int], b: Tuple[int, int, int, int]) -> bool:
+    return a[0] <= b[0] and a[1] <= b[1] and b[2] <= a[2] and b[3] <= a[3]
+
+
+def _union(a: Tuple[int, int, int, int], b: Tuple[int, int, int, int]) -> Tuple[int, int, int, int]:
+    return min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])
+
+
+def merge_areas(areas: List[Tuple[int, int, int, int]], command_size: int) -> List[Tuple[int, int, int, int]]:
+    # Merge areas (left, top, right, bottom) together as long as sending the merged area costs less than sending
+    # the areas separately, knowing that each area costs a bitmap command + transfer overhead + 2 bytes per pixel
+    def cost(area):
+        return command_size + TRANSFER_OVERHEAD + (area[2] - area[0]) * (area[3] - area[1]) * 2
+
+    if len(areas) > MAX_CHANGED_AREAS:
+        # Too many areas to find the best merge in reasonable time: send everything at once
+        merged_area = areas[0]
+        for area in areas[1:]:
+            merged_area = _union(merged_area, area)
+        return [merged_area]
+
+    areas = list(areas)
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(areas)):
+            for j in range(i + 1, len(areas)):
+                merged_area = _union(areas[i], areas[j])
+
+                # Other areas touched by the merged area must be entirely inside it, so that areas never overlap
+                touched = [k for k, area in enumerate(areas) if _intersects(merged_area, area)]
+                if any(not _contains(merged_area, areas[k]) for k in touched):
+                    continue
+
+                if cost(merged_area) <= sum(cost(areas[k]) for k in touched):
+                    areas = [area for k, area in enumerate(areas) if k not in touched] + [merged_area]
+                    merged = True
+                    break
+            if merged:
+                break
+
+    return areas
+
+
+class FrameBuffer:
+    def __init__(self, width: int, height: int, color: Optional[Tuple[int, int, int]] = None):
+        self.width = width
+        self.height = height
+
+        # Shadow copy of what is currently on the display (or about to be sent to it), in current orientation.
+        # If no color is provided the display content is unknown: the first images displayed will be sent entirely
+        self.image = Image.new("RGB", (width, height), color if color is not None else (0, 0, 0))
+
+        # Mask of the areas where the shadow copy is known to match the display content (255 = known)
+        self.known_area = Image.new("L", (width, height), 255 if color is not None else 0)
+
+        # Tiles (column, row) that changed since the last time changed areas have been sent, and mask of changed pixels
+        self.changed_tiles = set()
+        self.changed_area = Image.new("L", (width, height), 0)
+
+        # Mutex to protect the shadow image in case multiple threads display images at the same time
+        self.mutex = threading.Lock()
+
+    def update(self, image: Image.Image, x: int, y: int) -> bool:
+        # Copy image to the shadow image at (x, y) and mark the smallest area of the image that differs from the previous
+        # content as changed. Return False if the display already shows this image
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+
+        (image_width, image_height) = image.size
+        box = (x, y, x + image_width, y + image_height)
+
+        with self.mutex:
+            if box[2] <= self.width and box[3] <= self.height and self.known_area.crop(box).getextrema()[0] == 255:
+                changed_box = ImageChops.difference(self.image.crop(box), image).getbbox()
+            else:
+                # Display content is unknown, or image overflows the display: consider the whole image has changed
+                changed_box = (0, 0, image_width, image_height)
+
+            if not changed_box:
+                return False
+
+            self.image.paste(image, box)
+            self.known_area.paste(255, box)
+
+            # Changed area in display coordinates, without the parts that overflow the display
+            (left, top, right, bottom) = (max(x + changed_box[0], 0), max(y + changed_box[1], 0),
+                                          min(x + changed_box[2], self.width), min(y + changed_box[3], self.height))
+            if left >= right or top >= bottom:
+                return False
+
+            self.changed_area.paste(255, (left, top, right, bottom))
+            for row in range(top // TILE_SIZE, (bottom - 1) // TILE_SIZE + 1):
+                for column in range(left // TILE_SIZE, (right - 1) // TILE_SIZE + 1):
+                    self.changed_tiles.add((column, row))
+
+            return True
+
+    def changed_size(self) -> int:
+        # Max. size in bytes of the RGB565 data needed to send the changed areas
+        with self.mutex:
+            return len(self.changed_tiles) * TILE_SIZE * TILE_SIZE * 2
+
+    def pop_changed_areas(self, command_size: int) -> List[Tuple[Image.Image, int, int]]:
+        # Return the images (image, x, y) to send to the display so that it matches the shadow copy, in as few
+        # rectangles as possible, and consider the display is now up-to-date
+        with self.mutex:
+            if not self.changed_tiles:
+                return []
+
+            # Group adjacent changed tiles of the same row
+            areas = []
+            for (column, row) in sorted(self.changed_tiles, key=lambda tile: (tile[1], tile[0])):
+                area = (column * TILE_SIZE, row * TILE_SIZE,
+                        min((column + 1) * TILE_SIZE, self.width), min((row + 1) * TILE_SIZE, self.height))
+                if areas and areas[-1][1] == area[1] and areas[-1][2] == area[0]:
+                    areas[-1] = _union(areas[-1], area)
+                else:
+                    areas.append(area)
+
+            changed_images = []
+            for area in merge_areas(areas, command_size):
+                # Reduce each merged area to the pixels that actually changed
+                changed_box = self.changed_area.crop(area).getbbox()
+                if changed_box:
+                    (left, top) = (area[0] + changed_box[0], area[1] + changed_box[1])
+                    (right, bottom) = (area[0] + changed_box[2], area[1] + changed_box[3])
+                    changed_images.append((self.image.crop((left, top, right, bottom)), left, top))
+
+            self.changed_tiles.clear()
+            self.changed_area.paste(0, (0, 0, self.width, self.height))
+
+        return changed_images
@@ -22,14 +22,20 @@ import sys
 import threading
 from abc import ABC, abstractmethod
 from enum import IntEnum
-from typing import Tuple
+from typing import Callable, Hashable, List, Optional, Tuple, Union
 
 import serial
 from PIL import Image, ImageDraw, ImageFont
 
+from library.lcd.frame_buffer import FrameBuffer
+from library.lcd.update_queue import Priority, UpdateQueue, STOP_REQUEST
 from library.log import logger
 
 
+# Default maximum size in bytes of a single write on the serial port
+MAX_WRITE_SIZE = 16384
+
+
 class Orientation(IntEnum):
     PORTRAIT = 0
     LANDSCAPE = 2
@@ -38,6 +44,9 @@ class Orientation(IntEnum):
 
 
 class LcdComm(ABC):
+    # Size in bytes of the command sent before each bitmap, used to decide when changed areas are worth merging
+    BITMAP_COMMAND_SIZE = 0
+
     def __init__(self, com_port: str = "AUTO", display_width: int = 320, display_height: int = 480,
                  update_queue: queue.Queue = None):
         self.lcd_serial = None
@@ -60,6 +69,22 @@ class LcdComm(ABC):
         # mixed with other requests in-between
         self.update_queue_mutex = threading.Lock()
 
+        # Shadow copy of the display content, used to only send the part of the images that changed
+        self.frame_buffer = FrameBuffer(self.get_width(), self.get_height())
+
+        # Buffer large enough for a full screen bitmap, allocated once and reused to encode every bitmap sent.
+        # Encoded bitmaps are written to the serial port directly from the buffer, without copy: data must be written
+        # before the next bitmap is encoded
+        self.bitmap_buffer = bytearray(display_width * display_height * 2)
+
+        # Maximum size in bytes of a single write on the serial port: bitmap data and consecutive queued write requests
+        # are grouped up to this size to limit the number of writes
+        self.max_write_size = MAX_WRITE_SIZE
+
+        # If set, changed areas are sent each time an image is displayed. Otherwise, they are kept in the frame buffer
+        # until RequestFrameBufferFlush is called, so that many images are sent at once (e.g. once per frame tick)
+        self.flush_on_update = True
+
     def get_width(self) -> int:
         if self.orientation == Orientation.PORTRAIT or self.orientation == Orientation.REVERSE_PORTRAIT:
             return self.display_width
@@ -72,6 +97,74 @@ class LcdComm(ABC):
         else:
             return self.display_width
 
+    def reset_frame_buffer(self, color: Optional[Tuple[int, int, int]] = None):
+        # Must be called each time the display content or size changes outside DisplayPILImage (orientation, clear...)
+        # If no color is provided the display content is considered unknown
+        self.frame_buffer = FrameBuffer(self.get_width(), self.get_height(), color)
+
+    def queue_request(self, request: Tuple[Callable, list], key: Hashable = None, priority: Priority = Priority.DATA,
+                      size: int = None, droppable: bool = False):
+        # Queue a request. If a key is provided (e.g. "brightness"), a pending request of this display with the same key
+        # is replaced by this one, and control requests are processed before data requests, if the queue supports it.
+        # Size (in bytes) of the data sent by the request is computed from its arguments if not provided.
+        # Caller must lock the queue mutex
+        if isinstance(self.update_queue, UpdateQueue):
+            if size is None:
+                size = sum(len(arg) for arg in request[1] if isinstance(arg, (bytes, bytearray, memoryview)))
+            self.update_queue.put(request, key=(self, key) if key is not None else None, priority=priority, size=size,
+                                  droppable=droppable)
+        else:
+            self.update_queue.put(request)
+
+    def process_control_requests(self):
+        # Run pending control requests now, without waiting for data requests queued before them.
+        # Must only be called from the queue thread, between two requests or two bitmaps
+        if isinstance(self.update_queue, UpdateQueue):
+            while True:
+                try:
+                    f, args = self.update_queue.get_control_nowait()
+                except queue.Empty:
+                    break
+                if f:
+                    f(*args)
+
+    def UpdateFrameBuffer(self, image: Image, x: int, y: int, image_width: int, image_height: int):
+        # Copy image to the shadow frame buffer, then send the areas that changed to the display (if flush_on_update)
+        if image.size != (image_width, image_height):
+            image = image.crop(box=(0, 0, image_width, image_height))
+
+        if not self.frame_buffer.update(image, x, y):
+            # Display already shows this image
+            return
+
+        if self.flush_on_update:
+            self.RequestFrameBufferFlush()
+
+    def RequestFrameBufferFlush(self, droppable: bool = True):
+        # Send the areas of the frame buffer that changed since last flush, if any
+        # Request must not be droppable if the frame buffer is reset before the next flush (e.g. orientation change)
+        if not self.frame_buffer.changed_size():
+            return
+
+        if self.update_queue:
+            # Queue the request: changed areas of all images displayed until the request is processed are sent at once,
+            # so a pending request for the same frame buffer is replaced. If the request is dropped because the display
+            # is too slow, changed areas are kept in the frame buffer and will be sent by the next request
+            with self.update_queue_mutex:
+                self.queue_request((self.FlushFrameBuffer, [self.frame_buffer, self.orientation]),
+                                   key=self.frame_buffer, size=self.frame_buffer.changed_size(), droppable=droppable)
+        else:
+            # If no queue for async requests: do request now
+            self.FlushFrameBuffer(self.frame_buffer, self.orientation)
+
+    def FlushFrameBuffer(self, frame_buffer: FrameBuffer, orientation: Orientation):
+        # Send all areas of the frame buffer that changed since last flush, merged in as few bitmaps as possible.
+        # This is run from the queue thread (or directly if there is no queue), so bitmaps are written to the serial port
+        for (image, x, y) in frame_buffer.pop_changed_areas(self.BITMAP_COMMAND_SIZE):
+            # Control requests queued in the meantime do not wait for the whole frame, only for the current bitmap
+            self.process_control_requests()
+            self.SendBitmap(image, x, y, orientation)
+
     def openSerial(self):
         if self.com_port == 'AUTO':
             lcd_com_port = self.auto_detect_com_port()
@@ -101,21 +194,66 @@ class LcdComm(ABC):
             # We timed-out trying to write to our device, slow things down.
             logger.warning("(Write data) Too fast! Slow down!")
 
-    def SendLine(self, line: bytes):
-        if self.update_queue:
-            # Queue the request. Mutex is locked by caller to queue multiple lines
-            self.update_queue.put((self.WriteLine, [line]))
-        else:
-            # If no queue for async requests: do request now
-            self.WriteLine(line)
-
-    def WriteLine(self, line: bytes):
+    def WriteLine(self, line: Union[bytes, memoryview]):
         try:
             self.lcd_serial.write(line)
         except serial.serialutil.SerialTimeoutException:
             # We timed-out trying to write to our device, slow things down.
             logger.warning("(Write line) Too fast! Slow down!")
 
+    @staticmethod
+    def CoalesceRequests(requests: List[Tuple[Callable, list]]) -> List[Tuple[Callable, list]]:
+        # Merge consecutive queued commands (WriteData requests) to the same display into single writes, up to the display
+        # max. write size. Other requests are kept unchanged, and the order of all requests is preserved
+        # Only small commands (brightness, orientation...) are queued as write requests: bitmap data is written by the
+        # queue thread while flushing the frame buffer, already split in chunks of max. write size
+        coalesced_requests = []
+        pending_lcd = None
+        pending_data = []
+        pending_size = 0
+
+        def flush_pending():
+            if len(pending_data) == 1:
+                coalesced_requests.append((pending_lcd.WriteLine, pending_data))
+            elif pending_data:
+                coalesced_requests.append((pending_lcd.WriteLine, [b"".join(pending_data)]))
+
+        for f, args in requests:
+            lcd = getattr(f, '__self__', None)
+            if isinstance(lcd, LcdComm) and f.__func__ is LcdComm.WriteData:
+                data = args[0]
+                if lcd is pending_lcd and pending_size + len(data) <= lcd.max_write_size:
+                    pending_data.append(data)
+                    pending_size += len(data)
+                    continue
+                flush_pending()
+                (pending_lcd, pending_data, pending_size) = (lcd, [data], len(data))
+            else:
+                flush_pending()
+                (pending_lcd, pending_data, pending_size) = (None, [], 0)
+                coalesced_requests.append((f, args))
+
+        flush_pending()
+        return coalesced_requests
+
+    @staticmethod
+    def ProcessQueue(update_queue: queue.Queue) -> bool:
+        # Wait for requests in the queue, then do all requests waiting in the queue at once, in order, with consecutive
+        # serial writes grouped into bigger writes. Return False once STOP_REQUEST has been received: the thread
+        # processing the queue must then stop
+        requests = [update_queue.get()]
+        while True:
+            try:
+                requests.append(update_queue.get_nowait())
+            except queue.Empty:
+                break
+
+        for f, args in LcdComm.CoalesceRequests(requests):
+            if f:
+                f(*args)
+
+        return not any(request is STOP_REQUEST for request in requests)
+
     @staticmethod
     @abstractmethod
     def auto_detect_com_port():
@@ -163,6 +301,10 @@ class LcdComm(ABC):
     ):
         pass
 
+    @abstractmethod
+    def SendBitmap(self, image: Image, x: int, y: int, orientation: Orientation):
+        pass
+
     def DisplayBitmap(self, bitmap_path: str, x: int = 0, y: int = 0, width: int = 0, height: int = 0):
         image = Image.open(bitmap_path)
         self.DisplayPILImage(image, x, y, width, height)
@@ -264,7 +406,8 @@ class LcdComm(ABC):
         # Draw progress bar
         bar_filled_width = value / (max_value - min_value) * width
         draw = ImageDraw.Draw(bar_image)
-        draw.rectangle([0, 0, bar_filled_width - 1, height - 1], fill=bar_color, outline=bar_color)
+        if bar_filled_width >= 1:
+            draw.rectangle([0, 0, bar_filled_width - 1, height - 1], fill=bar_color, outline=bar_color)
 
         if bar_outline:
             # Draw outline
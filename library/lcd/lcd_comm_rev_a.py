@@ -16,12 +16,12 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
-import struct
 import time
 
 from serial.tools.list_ports import comports
 
 from library.lcd.lcd_comm import *
+from library.lcd.serialize import image_to_RGB565, chunked
 from library.log import logger
 
 
@@ -37,6 +37,8 @@ class Command(IntEnum):
 
 
 class LcdCommRevA(LcdComm):
+    BITMAP_COMMAND_SIZE = 6
+
     def __init__(self, com_port: str = "AUTO", display_width: int = 320, display_height: int = 480,
                  update_queue: queue.Queue = None):
         LcdComm.__init__(self, com_port, display_width, display_height, update_queue)
@@ -56,7 +58,8 @@ class LcdCommRevA(LcdComm):
 
         return auto_com_port
 
-    def SendCommand(self, cmd: Command, x: int, y: int, ex: int, ey: int, bypass_queue: bool = False):
+    def SendCommand(self, cmd: Command, x: int, y: int, ex: int, ey: int, bypass_queue: bool = False,
+                    key: Hashable = None, priority: Priority = Priority.DATA):
         byteBuffer = bytearray(6)
         byteBuffer[0] = (x >> 2)
         byteBuffer[1] = (((x & 3) << 6) + (y >> 4))
@@ -71,7 +74,7 @@ class LcdCommRevA(LcdComm):
         else:
             # Lock queue mutex then queue the request
             with self.update_queue_mutex:
-                self.update_queue.put((self.WriteData, [byteBuffer]))
+                self.queue_request((self.WriteData, [byteBuffer]), key=key, priority=priority)
 
     def InitializeComm(self):
         # HW revision A does not need init commands
@@ -85,17 +88,20 @@ class LcdCommRevA(LcdComm):
         # Wait for display reset then reconnect
         time.sleep(5)
         self.openSerial()
+        self.reset_frame_buffer()
 
     def Clear(self):
         self.SetOrientation(Orientation.PORTRAIT)  # Bug: orientation needs to be PORTRAIT before clearing
         self.SendCommand(Command.CLEAR, 0, 0, 0, 0)
         self.SetOrientation()  # Restore default orientation
+        self.reset_frame_buffer(color=(255, 255, 255))
 
     def ScreenOff(self):
-        self.SendCommand(Command.SCREEN_OFF, 0, 0, 0, 0)
+        # Only the last screen on/off command queued is worth sending, and it does not wait for pending bitmaps
+        self.SendCommand(Command.SCREEN_OFF, 0, 0, 0, 0, key="screen", priority=Priority.CONTROL)
 
     def ScreenOn(self):
-        self.SendCommand(Command.SCREEN_ON, 0, 0, 0, 0)
+        self.SendCommand(Command.SCREEN_ON, 0, 0, 0, 0, key="screen", priority=Priority.CONTROL)
 
     def SetBrightness(self, level: int = 25):
         assert 0 <= level <= 100, 'Brightness level must be [0-100]'
@@ -105,7 +111,9 @@ class LcdCommRevA(LcdComm):
         level_absolute = int(255 - ((level / 100) * 255))
 
         # Level : 0 (brightest) - 255 (darkest)
-        self.SendCommand(Command.SET_BRIGHTNESS, level_absolute, 0, 0, 0)
+        # Only the last brightness level queued is worth sending, and it does not wait for pending bitmaps
+        self.SendCommand(Command.SET_BRIGHTNESS, level_absolute, 0, 0, 0, key="brightness",
+                         priority=Priority.CONTROL)
 
     def SetBackplateLedColor(self, led_color: Tuple[int, int, int] = (255, 255, 255)):
         logger.info("HW revision A does not support backplate LED color setting")
@@ -113,6 +121,7 @@ class LcdCommRevA(LcdComm):
 
     def SetOrientation(self, orientation: Orientation = Orientation.PORTRAIT):
         self.orientation = orientation
+        self.reset_frame_buffer()
         width = self.get_width()
         height = self.get_height()
         x = 0
@@ -157,30 +166,18 @@ class LcdCommRevA(LcdComm):
         assert image_height > 0, 'Image height must be > 0'
         assert image_width > 0, 'Image width must be > 0'
 
-        (x0, y0) = (x, y)
-        (x1, y1) = (x + image_width - 1, y + image_height - 1)
-
-        self.SendCommand(Command.DISPLAY_BITMAP, x0, y0, x1, y1)
+        # Only the parts of the image that are not already on the display will be sent
+        self.UpdateFrameBuffer(image, x, y, image_width, image_height)
 
-        pix = image.load()
-        line = bytes()
-
-        # Lock queue mutex then queue all the requests for the image data
-        with self.update_queue_mutex:
-            for h in range(image_height):
-                for w in range(image_width):
-                    R = pix[w, h][0] >> 3
-                    G = pix[w, h][1] >> 2
-                    B = pix[w, h][2] >> 3
+    def SendBitmap(self, image: Image, x: int, y: int, orientation: Orientation):
+        # Bitmap command and image data are written directly: they must not be mixed with other requests in-between
+        (x0, y0) = (x, y)
+        (x1, y1) = (x + image.size[0] - 1, y + image.size[1] - 1)
 
-                    rgb = (R << 11) | (G << 5) | B
-                    line += struct.pack('H', rgb)
+        self.SendCommand(Command.DISPLAY_BITMAP, x0, y0, x1, y1, bypass_queue=True)
 
-                    # Send image data by multiple of DISPLAY_WIDTH bytes
-                    if len(line) >= self.get_width() * 8:
-                        self.SendLine(line)
-                        line = bytes()
+        rgb565 = image_to_RGB565(image, out=self.bitmap_buffer)
 
-            # Write last line if needed
-            if len(line) > 0:
-                self.SendLine(line)
+        # Send image data by chunks of max. write size, as views on the bitmap buffer
+        for chunk in chunked(rgb565, self.max_write_size):
+            self.WriteLine(chunk)
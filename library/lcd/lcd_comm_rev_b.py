@@ -16,11 +16,10 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
-import struct
-
 from serial.tools.list_ports import comports
 
 from library.lcd.lcd_comm import *
+from library.lcd.serialize import image_to_RGB565, chunked
 from library.log import logger
 
 
@@ -48,6 +47,8 @@ class SubRevision(IntEnum):
 
 
 class LcdCommRevB(LcdComm):
+    BITMAP_COMMAND_SIZE = 10
+
     def __init__(self, com_port: str = "AUTO", display_width: int = 320, display_height: int = 480,
                  update_queue: queue.Queue = None):
         LcdComm.__init__(self, com_port, display_width, display_height, update_queue)
@@ -74,7 +75,8 @@ class LcdCommRevB(LcdComm):
 
         return auto_com_port
 
-    def SendCommand(self, cmd: Command, payload=None, bypass_queue: bool = False):
+    def SendCommand(self, cmd: Command, payload=None, bypass_queue: bool = False, key: Hashable = None,
+                    priority: Priority = Priority.DATA):
         # New protocol (10 byte packets, framed with the command, 8 data bytes inside)
         if payload is None:
             payload = [0] * 8
@@ -99,7 +101,7 @@ class LcdCommRevB(LcdComm):
         else:
             # Lock queue mutex then queue the request
             with self.update_queue_mutex:
-                self.update_queue.put((self.WriteData, [byteBuffer]))
+                self.queue_request((self.WriteData, [byteBuffer]), key=key, priority=priority)
 
     def Hello(self):
         hello = [ord('H'), ord('E'), ord('L'), ord('L'), ord('O')]
@@ -147,9 +149,13 @@ class LcdCommRevB(LcdComm):
 
         blank = Image.new("RGB", (self.get_width(), self.get_height()), (255, 255, 255))
         self.DisplayPILImage(blank)
+        # Send the blank image now even if images are only sent on frame ticks: the frame buffer holding it is reset
+        # when the orientation is restored
+        self.RequestFrameBufferFlush(droppable=False)
 
         # Restore orientation
         self.SetOrientation(orientation=backup_orientation)
+        self.reset_frame_buffer(color=(255, 255, 255))
 
     def ScreenOff(self):
         # HW revision B does not implement a "ScreenOff" native command: using SetBrightness(0) instead
@@ -171,13 +177,16 @@ class LcdCommRevB(LcdComm):
             logger.info("Your display does not support custom brightness level")
             converted_level = 1 if level == 0 else 0
 
-        self.SendCommand(Command.SET_BRIGHTNESS, payload=[converted_level])
+        # Only the last brightness level queued is worth sending, and it does not wait for pending bitmaps
+        self.SendCommand(Command.SET_BRIGHTNESS, payload=[converted_level], key="brightness",
+                         priority=Priority.CONTROL)
 
     def SetBackplateLedColor(self, led_color: Tuple[int, int, int] = (255, 255, 255)):
         if isinstance(led_color, str):
             led_color = tuple(map(int, led_color.split(', ')))
         if self.is_flagship():
-            self.SendCommand(Command.SET_LIGHTING, payload=list(led_color))
+            self.SendCommand(Command.SET_LIGHTING, payload=list(led_color), key="led_color",
+                             priority=Priority.CONTROL)
         else:
             logger.info("Only HW revision 'flagship' supports backplate LED color setting")
 
@@ -185,6 +194,7 @@ class LcdCommRevB(LcdComm):
         # In revision B, basic orientations (portrait / landscape) are managed by the display
         # The reverse orientations (reverse portrait / reverse landscape) are software-managed
         self.orientation = orientation
+        self.reset_frame_buffer()
         if self.orientation == Orientation.PORTRAIT or self.orientation == Orientation.REVERSE_PORTRAIT:
             self.SendCommand(Command.SET_ORIENTATION, payload=[OrientationValueRevB.ORIENTATION_PORTRAIT])
         else:
@@ -214,50 +224,47 @@ class LcdCommRevB(LcdComm):
         assert image_height > 0, 'Image height must be > 0'
         assert image_width > 0, 'Image width must be > 0'
 
-        if self.orientation == Orientation.PORTRAIT or self.orientation == Orientation.LANDSCAPE:
+        # Only the parts of the image that are not already on the display will be sent
+        self.UpdateFrameBuffer(image, x, y, image_width, image_height)
+
+    def SendBitmap(self, image: Image, x: int, y: int, orientation: Orientation):
+        # Bitmap command and image data are written directly: they must not be mixed with other requests in-between
+        (image_width, image_height) = image.size
+
+        if orientation == Orientation.PORTRAIT or orientation == Orientation.LANDSCAPE:
             (x0, y0) = (x, y)
             (x1, y1) = (x + image_width - 1, y + image_height - 1)
         else:
-            (x0, y0) = (self.get_width() - x - image_width, self.get_height() - y - image_height)
-            (x1, y1) = (self.get_width() - x - 1, self.get_height() - y - 1)
+            # Reverse orientations are software-managed: coordinates are mirrored in the native orientation
+            if orientation == Orientation.REVERSE_PORTRAIT:
+                (width, height) = (self.display_width, self.display_height)
+            else:
+                (width, height) = (self.display_height, self.display_width)
+            (x0, y0) = (width - x - image_width, height - y - image_height)
+            (x1, y1) = (width - x - 1, height - y - 1)
 
         self.SendCommand(Command.DISPLAY_BITMAP,
                          payload=[(x0 >> 8) & 255, x0 & 255,
                                   (y0 >> 8) & 255, y0 & 255,
                                   (x1 >> 8) & 255, x1 & 255,
-                                  (y1 >> 8) & 255, y1 & 255])
-        pix = image.load()
-        line = bytes()
-
-        # Lock queue mutex then queue all the requests for the image data
-        with self.update_queue_mutex:
-            for h in range(image_height):
-                for w in range(image_width):
-                    if self.orientation == Orientation.PORTRAIT or self.orientation == Orientation.LANDSCAPE:
-                        R = pix[w, h][0] >> 3
-                        G = pix[w, h][1] >> 2
-                        B = pix[w, h][2] >> 3
-                    else:
-                        R = pix[image_width - w - 1, image_height - h - 1][0] >> 3
-                        G = pix[image_width - w - 1, image_height - h - 1][1] >> 2
-                        B = pix[image_width - w - 1, image_height - h - 1][2] >> 3
-
-                    # Revision A: 0bRRRRRGGGGGGBBBBB
-                    #               fedcba9876543210
-                    # Revision B: 0bgggBBBBBRRRRRGGG
-                    # That is...
-                    #   High 3 bits of green in b0-b2
-                    #   Low 3 bits of green in b13-b15
-                    #   Red 5 bits in b3-b7
-                    #   Blue 5 bits in b8-b12
-                    rgb = (B << 8) | (G >> 3) | ((G & 7) << 13) | (R << 3)
-                    line += struct.pack('H', rgb)
-
-                    # Send image data by multiple of DISPLAY_WIDTH bytes
-                    if len(line) >= self.get_width() * 8:
-                        self.SendLine(line)
-                        line = bytes()
-
-            # Write last line if needed
-            if len(line) > 0:
-                self.SendLine(line)
+                                  (y1 >> 8) & 255, y1 & 255],
+                         bypass_queue=True)
+
+        # Revision A: 0bRRRRRGGGGGGBBBBB
+        #               fedcba9876543210
+        # Revision B: 0bgggBBBBBRRRRRGGG
+        # That is...
+        #   High 3 bits of green in b0-b2
+        #   Low 3 bits of green in b13-b15
+        #   Red 5 bits in b3-b7
+        #   Blue 5 bits in b8-b12
+        # Once sent as little-endian words, revision B format is exactly RGB565 in big-endian.
+        # Reverse orientations are software-managed: the whole image is rotated by 180° before being encoded
+        rgb565 = image_to_RGB565(image, endianness="big",
+                                 rotate_180=(orientation == Orientation.REVERSE_PORTRAIT or
+                                             orientation == Orientation.REVERSE_LANDSCAPE),
+                                 out=self.bitmap_buffer)
+
+        # Send image data by chunks of max. write size, as views on the bitmap buffer
+        for chunk in chunked(rgb565, self.max_write_size):
+            self.WriteLine(chunk)
@@ -96,6 +96,7 @@ class LcdSimulated(LcdComm):
 
     def SetOrientation(self, orientation: Orientation = Orientation.PORTRAIT):
         self.orientation = orientation
+        self.reset_frame_buffer()
         # Just draw the screen again with the new width/height based on orientation
         with self.update_queue_mutex:
             self.screen_image = Image.new("RGB", (self.get_width(), self.get_height()), (255, 255, 255))
@@ -126,6 +127,10 @@ class LcdSimulated(LcdComm):
         assert image_height > 0, 'Image height must be > 0'
         assert image_width > 0, 'Image width must be > 0'
 
+        # Only the parts of the image that are not already on the simulated display will be drawn
+        self.UpdateFrameBuffer(image, x, y, image_width, image_height)
+
+    def SendBitmap(self, image: Image, x: int, y: int, orientation: Orientation):
         with self.update_queue_mutex:
             self.screen_image.paste(image, (x, y))
             self.screen_image.save("tmp", "PNG")
@@ -0,0 +1,156 @@
+# turing-smart-screen-python - a Python system monitor and library for 3.5" USB-C displays like Turing Smart Screen or XuanFang
+# https://github.com/mathoudebine/turing-smart-screen-python/
+
+# Copyright (C) 2021-2023  Matthieu Houdebine (mathoudebine)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# This file converts PIL images to the RGB565 pixel format expected by the displays
+# NumPy is used when available to encode whole bands of the image at once, otherwise a pure-Python encoder based on
+# lookup tables is used
+
+import sys
+from typing import Iterator, Tuple
+
+from PIL import Image
+
+# Vectorized encoding (optional)
+try:
+    import numpy as np
+except:
+    np = None
+
+# Precomputed per-channel tables used by the pure-Python encoder: for each 8-bit channel value, give its bits in the
+# high byte (0bRRRRRGGG) and the low byte (0bGGGBBBBB) of the RGB565 word
+_R_TO_HIGH_BYTE = bytes(value & 0xF8 for value in range(256))
+_G_TO_HIGH_BYTE = bytes(value >> 5 for value in range(256))
+_G_TO_LOW_BYTE = bytes(((value >> 2) & 0x07) << 5 for value in range(256))
+_B_TO_LOW_BYTE = bytes(value >> 3 for value in range(256))
+
+# Tables used by the NumPy encoder to keep the 5/6/5 most significant bits of each channel of RGB / RGBA images
+_RGB_TO_565_LUT = [value >> 3 for value in range(256)] + [value >> 2 for value in range(256)] + \
+                  [value >> 3 for value in range(256)]
+_RGBA_TO_565_LUT = _RGB_TO_565_LUT + list(range(256))
+
+# Images are encoded by bands of this number of rows, so that pixels are never copied as a whole in Python memory: only
+# the output buffer has the size of the image
+BAND_ROWS = 16
+
+
+def image_to_RGB565(image: Image.Image, image_width: int = 0, image_height: int = 0, endianness: str = "little",
+                    rotate_180: bool = False, out: bytearray = None) -> memoryview:
+    # Encode the top-left image_width x image_height area of the image as RGB565:
+    #   0bRRRRRGGGGGGBBBBB
+    #     fedcba9876543210
+    # Each 16-bit pixel is serialized with the requested endianness ("little" or "big")
+    # If rotate_180 is set, the area is rotated by 180° before being encoded (pixels are sent in reverse order)
+    # Encoded data is written to the provided out buffer if any, so that it can be reused for each image, and a
+    # zero-copy view on the encoded part of the buffer is returned
+    assert endianness in ["little", "big"], 'Endianness must be "little" or "big"'
+
+    if not image_width:
+        image_width = image.size[0]
+    if not image_height:
+        image_height = image.size[1]
+
+    if image.size != (image_width, image_height):
+        image = image.crop(box=(0, 0, image_width, image_height))
+
+    if image.mode not in ["RGB", "RGBA"]:
+        # R, G and B need to be the first 3 channels
+        image = image.convert("RGB")
+
+    if out is None:
+        out = bytearray(image_width * image_height * 2)
+    assert len(out) >= image_width * image_height * 2, 'Output buffer is too small for the image'
+    rgb565 = memoryview(out)[:image_width * image_height * 2]
+
+    if np is not None:
+        _image_to_RGB565_numpy(image, endianness, rotate_180, rgb565)
+    else:
+        _image_to_RGB565_python(image, endianness, rotate_180, rgb565)
+    return rgb565
+
+
+def _image_bands(image: Image.Image, rotate_180: bool) -> Iterator[Tuple[int, int, bytes]]:
+    # Split the image in bands of BAND_ROWS rows and return (first row, last row + 1, raw pixels) of each band, in the
+    # order they are encoded. Image is never copied as a whole in Python memory: only one band at a time
+    # If rotate_180 is set, bands are taken from the bottom of the image: their pixels must then be reversed
+    (width, height) = image.size
+    for y0 in range(0, height, BAND_ROWS):
+        y1 = min(y0 + BAND_ROWS, height)
+        if rotate_180:
+            yield y0, y1, image.crop(box=(0, height - y1, width, height - y0)).tobytes()
+        else:
+            yield y0, y1, image.crop(box=(0, y0, width, y1)).tobytes()
+
+
+def _image_to_RGB565_numpy(image: Image.Image, endianness: str, rotate_180: bool, out: memoryview):
+    # Keep the 5/6/5 most significant bits of each channel (done by PIL, outside Python memory)
+    image = image.point(_RGB_TO_565_LUT if image.mode == "RGB" else _RGBA_TO_565_LUT)
+    (width, height) = image.size
+    channels = len(image.getbands())
+
+    # Build the 16-bit words directly in the output buffer, one band of the image at a time
+    rgb565 = np.frombuffer(out, dtype=np.uint16).reshape((height, width))
+    for (y0, y1, data) in _image_bands(image, rotate_180):
+        rgb = np.frombuffer(data, dtype=np.uint8).reshape((y1 - y0, width, channels))
+        if rotate_180:
+            # Reverse rows and columns at once: this is only a view on the same pixels, nothing is copied
+            rgb = rgb[::-1, ::-1]
+        words = rgb565[y0:y1]
+        words[...] = rgb[:, :, 0]
+        words <<= 6
+        words |= rgb[:, :, 1]
+        words <<= 5
+        words |= rgb[:, :, 2]
+
+    # Words are built in native byte order: swap bytes in-place if needed
+    if endianness != sys.byteorder:
+        rgb565.byteswap(inplace=True)
+
+
+def _image_to_RGB565_python(image: Image.Image, endianness: str, rotate_180: bool, out: memoryview):
+    if rotate_180:
+        image = image.transpose(Image.ROTATE_180)
+
+    (width, height) = image.size
+    channels = len(image.getbands())
+    (high_offset, low_offset) = (1, 0) if endianness == "little" else (0, 1)
+
+    for (y0, y1, data) in _image_bands(image, False):
+        # Split raw pixel data of the band in one byte string per channel
+        pixel_count = width * (y1 - y0)
+        r = data[0::channels]
+        g = data[1::channels]
+        b = data[2::channels]
+
+        # Translate each channel to its bits in the high/low byte of the RGB565 word, then merge the channels
+        # Bits of different channels never overlap so merging is a simple OR, done at once on the whole band
+        high = (int.from_bytes(r.translate(_R_TO_HIGH_BYTE), 'big') |
+                int.from_bytes(g.translate(_G_TO_HIGH_BYTE), 'big')).to_bytes(pixel_count, 'big')
+        low = (int.from_bytes(g.translate(_G_TO_LOW_BYTE), 'big') |
+               int.from_bytes(b.translate(_B_TO_LOW_BYTE), 'big')).to_bytes(pixel_count, 'big')
+
+        # Interleave high/low bytes in the output buffer according to endianness
+        band = out[y0 * width * 2:y1 * width * 2]
+        band[high_offset::2] = high
+        band[low_offset::2] = low
+
+
+def chunked(data: memoryview, chunk_size: int) -> Iterator[memoryview]:
+    # Split data in chunks of chunk_size bytes (last chunk may be smaller). Chunks are views on data: nothing is copied
+    data = memoryview(data)
+    for i in range(0, len(data), chunk_size):
+        yield data[i:i + chunk_size]
@@ -0,0 +1,163 @@
+# turing-smart-screen-python - a Python system monitor and library for 3.5" USB-C displays like Turing Smart Screen or XuanFang
+# https://github.com/mathoudebine/turing-smart-screen-python/
+
+# Copyright (C) 2021-2023  Matthieu Houdebine (mathoudebine)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# This file defines the queue of serial requests waiting to be sent to the display
+# Requests can be queued with a key (e.g. a region of the screen or a setting): a new request with the same key as a
+# request not sent yet replaces it, so that the queue does not fill up with outdated requests when the display is slow
+# Control requests (brightness, screen on/off...) have their own lane and are always processed before data requests
+# The queue can be limited to an amount of pending data (in bytes): when it is full, producers are blocked or display
+# frames are dropped depending on the selected policy
+
+import queue
+import time
+from collections import OrderedDict
+from enum import IntEnum
+from typing import Any, Hashable
+
+from library.log import logger
+
+
+class Priority(IntEnum):
+    CONTROL = 0  # Short commands changing the display state: processed first, even between bitmaps of a frame
+    DATA = 1  # Display content: processed in order
+
+
+# Policies when the queue is full
+BLOCK = "block"  # Wait for enough requests to be processed
+DROP_OLDEST = "drop_oldest"  # Drop the oldest droppable requests (display frames) to make room for the new one
+SKIP_NEW = "skip_new"  # Drop the new request if it is droppable
+POLICIES = [BLOCK, DROP_OLDEST, SKIP_NEW]
+
+# Request queued to stop the thread processing the queue, once the requests queued before it are processed
+STOP_REQUEST = (None, [])
+
+
+class UpdateQueue(queue.Queue):
+    def __init__(self, max_bytes: int = 0, policy: str = DROP_OLDEST):
+        assert policy in POLICIES, 'Queue policy must be one of ' + str(POLICIES)
+
+        # Max. amount of data (in bytes) of pending requests, 0 for unlimited. A single request bigger than this limit is
+        # accepted when the queue is empty
+        self.max_bytes = max_bytes
+        self.policy = policy
+
+        # Number of requests replaced by a newer request with the same key before being processed
+        self.superseded_count = 0
+
+        # Number of droppable requests (display frames) dropped because the queue was full, and their size in bytes
+        self.dropped_count = 0
+        self.dropped_bytes = 0
+
+        queue.Queue.__init__(self)
+
+    def _init(self, maxsize: int):
+        # Pending requests of each priority in the order they will be processed, indexed by key. Requests queued without
+        # a key get a unique key so that they are never replaced. Each entry is (request, size, droppable)
+        self.queue = [OrderedDict() for _ in Priority]
+        self.pending_bytes = 0
+
+    def put(self, item: Any, block: bool = True, timeout: float = None, key: Hashable = None,
+            priority: Priority = Priority.DATA, size: int = 0, droppable: bool = False):
+        # Queue the request. If a request with the same key is pending, it is removed and the new request is queued
+        # last: pending requests of a priority are always a subsequence of queued requests, so relative order is kept
+        # Size is the amount of data (in bytes) the request will send. Droppable requests can be dropped if queue is full
+        if key is None:
+            key = object()
+
+        with self.not_full:
+            if not self._fits(key, size):
+                if self.policy == BLOCK:
+                    if not block:
+                        raise queue.Full
+                    deadline = time.monotonic() + timeout if timeout is not None else None
+                    while not self._fits(key, size):
+                        remaining = deadline - time.monotonic() if deadline is not None else None
+                        if remaining is not None and remaining <= 0:
+                            raise queue.Full
+                        self.not_full.wait(remaining)
+                elif self.policy == DROP_OLDEST:
+                    self._drop_oldest(key, size)
+                elif droppable:
+                    # SKIP_NEW
+                    self._count_dropped(size)
+                    return
+
+            self._put((key, priority, item, size, droppable))
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+
+    def get_control_nowait(self) -> Any:
+        # Get next pending control request, without waiting for data requests queued before it.
+        # Raise queue.Empty if there is none
+        with self.not_empty:
+            if not self.queue[Priority.CONTROL]:
+                raise queue.Empty
+            return self._pop(self.queue[Priority.CONTROL])
+
+    def _fits(self, key: Hashable, size: int) -> bool:
+        # Pending request with the same key (if any) will be replaced, so its size does not count.
+        # Requests without data (e.g. STOP_REQUEST) always fit
+        if not self.max_bytes or not self._qsize() or not size:
+            return True
+        replaced_size = 0
+        for lane in self.queue:
+            if key in lane:
+                replaced_size = lane[key][1]
+        return self.pending_bytes - replaced_size + size <= self.max_bytes
+
+    def _drop_oldest(self, key: Hashable, size: int):
+        lane = self.queue[Priority.DATA]
+        for dropped_key in [k for k, (_, _, droppable) in lane.items() if droppable and k != key]:
+            if self._fits(key, size):
+                break
+            (_, dropped_size, _) = lane.pop(dropped_key)
+            self.pending_bytes -= dropped_size
+            self.unfinished_tasks -= 1
+            self._count_dropped(dropped_size)
+
+    def _count_dropped(self, size: int):
+        if not self.dropped_count:
+            logger.warning("Display is too slow, some frames will not be displayed")
+        self.dropped_count += 1
+        self.dropped_bytes += size
+
+    def _qsize(self) -> int:
+        return sum(len(lane) for lane in self.queue)
+
+    def _put(self, keyed_item):
+        (key, priority, item, size, droppable) = keyed_item
+        for lane in self.queue:
+            if key in lane:
+                self.pending_bytes -= lane.pop(key)[1]
+                self.superseded_count += 1
+                # The replaced request will never be processed: do not wait for it in join()
+                self.unfinished_tasks -= 1
+        self.queue[priority][key] = (item, size, droppable)
+        self.pending_bytes += size
+
+    def _get(self) -> Any:
+        for lane in self.queue:
+            if lane:
+                return self._pop(lane)
+
+    def _pop(self, lane: OrderedDict) -> Any:
+        (item, size, _) = lane.popitem(last=False)[1]
+        self.pending_bytes -= size
+        # Some blocked producers may have enough room now
+        self.not_full.notify_all()
+        return item
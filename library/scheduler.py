@@ -18,17 +18,413 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+import asyncio
+import heapq
+import itertools
+import queue
 import sched
 import threading
 import time
+from collections import deque
 from datetime import timedelta
 from functools import wraps
+from typing import Callable, List, NamedTuple
 
 import library.config as config
+import library.sensors.sensors_cache as sensors_cache
 import library.stats as stats
+from library.display import display
+from library.lcd.lcd_comm import LcdComm
+from library.lcd.update_queue import STOP_REQUEST
+from library.log import logger
 
 STOPPING = False
 
+# Max. number of threads running jobs at the same time
+WORKERS = 4
+
+# Number of latest runs of each job used to compute its statistics
+STATS_SAMPLES = 1000
+
+
+class JobStats(NamedTuple):
+    name: str
+    interval: float  # Expected period (s)
+    runs: int
+    overruns: int  # Runs skipped because the job was late by more than its interval or still running
+    period: float  # Average actual period (s)
+    lateness_p50: float  # Median delay between the time a job is due and the time it starts running (s)
+    lateness_p99: float
+
+
+def _percentile(samples: List[float], percent: float) -> float:
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    return samples[int(round(percent / 100 * (len(samples) - 1)))]
+
+
+class Job:
+    def __init__(self, name: str, interval: float, func: Callable, args: tuple = (), catch_up: bool = False):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self.args = args
+
+        # If a job is late by more than its interval, missed runs are done as soon as possible if catch_up is set,
+        # otherwise they are skipped and the job keeps its initial cadence
+        self.catch_up = catch_up
+
+        # Next time (time.monotonic) the job is due. Deadlines are absolute so that delays never accumulate
+        self.deadline = time.monotonic()
+        # Time the run being dispatched was due, to compute its lateness once it actually starts
+        self.dispatched_deadline = None
+
+        # A job is never run again while it is still running
+        self.running = False
+        self.failed = False
+
+        # Statistics on latest runs
+        self.run_count = 0
+        self.overrun_count = 0
+        self.last_start = None
+        self.periods = deque(maxlen=STATS_SAMPLES)
+        self.lateness = deque(maxlen=STATS_SAMPLES)
+
+    def started(self, now: float):
+        # Must be called each time the job is dispatched, before reschedule()
+        self.run_count += 1
+        self.dispatched_deadline = self.deadline
+        if self.last_start is not None:
+            self.periods.append(now - self.last_start)
+        self.last_start = now
+
+    def reschedule(self, now: float):
+        # Move deadline to the next run, must be called each time the job is started
+        self.deadline += self.interval
+        if not self.catch_up:
+            self._skip_missed_runs(now)
+
+    def skip(self, now: float):
+        # Skip this run because the job is still running from last time, and move deadline to the next run
+        self.overrun_count += 1
+        self.deadline += self.interval
+        self._skip_missed_runs(now)
+
+    def _skip_missed_runs(self, now: float):
+        if self.deadline <= now:
+            missed = int((now - self.deadline) // self.interval) + 1
+            self.deadline += missed * self.interval
+            self.overrun_count += missed
+
+    def stats(self) -> JobStats:
+        periods = list(self.periods)
+        lateness = list(self.lateness)
+        return JobStats(name=self.name, interval=self.interval, runs=self.run_count, overruns=self.overrun_count,
+                        period=sum(periods) / len(periods) if periods else 0.0,
+                        lateness_p50=_percentile(lateness, 50), lateness_p99=_percentile(lateness, 99))
+
+    def run(self):
+        # Lateness is measured when the job actually starts running: it includes the time spent waiting for a worker
+        self.lateness.append(time.monotonic() - self.dispatched_deadline)
+        try:
+            self.func(*self.args)
+        except Exception:
+            if not self.failed:
+                # Only log the first failure with details, the job is likely to fail the same way at each run
+                logger.exception("Job %s failed, it will keep running but next errors will not be logged" % self.name)
+                self.failed = True
+        finally:
+            self.running = False
+
+
+class JobScheduler:
+    # Runs all periodic jobs: a single thread waits for the next due job in a timer heap, then dispatches it to a small
+    # pool of worker threads
+    def __init__(self, workers: int = WORKERS):
+        self.workers = workers
+        self.threads = []
+        self.stopping = False
+
+        # Heap of (deadline, sequence, job): sequence keeps jobs with the same deadline in registration order
+        self.jobs = []
+        self.registered_jobs = []
+        self.sequence = itertools.count()
+        self.condition = threading.Condition()
+
+        # Due jobs waiting for a free worker thread. None is sent to worker threads to stop them
+        self.due_jobs = queue.Queue()
+
+    def register(self, name: str, interval: float, func: Callable, *args, catch_up: bool = False) -> Job:
+        # Add a job run every interval seconds, first run is now. The scheduler is started if needed
+        job = Job(name, interval, func, args, catch_up)
+        with self.condition:
+            self.registered_jobs.append(job)
+            heapq.heappush(self.jobs, (job.deadline, next(self.sequence), job))
+            self.condition.notify()
+        self.start()
+        return job
+
+    def start(self):
+        with self.condition:
+            if self.threads or self.stopping:
+                return
+            self.threads.append(threading.Thread(target=self._run, name="Job_Scheduler"))
+            for i in range(self.workers):
+                self.threads.append(threading.Thread(target=self._work, name="Job_Worker_%d" % i))
+            for thread in self.threads:
+                thread.start()
+
+    def stats(self) -> List[JobStats]:
+        return [job.stats() for job in self.registered_jobs]
+
+    def stop(self):
+        # Stop dispatching jobs and stop all threads. Running jobs are not interrupted
+        with self.condition:
+            self.stopping = True
+            self.condition.notify()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                now = time.monotonic()
+                if self.stopping:
+                    break
+                if not self.jobs or self.jobs[0][0] > now:
+                    # Sleep until next job is due, a job is registered or the scheduler is stopped
+                    self.condition.wait(self.jobs[0][0] - now if self.jobs else None)
+                    continue
+                (_, _, job) = heapq.heappop(self.jobs)
+
+                # Run the job if it is not still running from last time, and re-schedule it for future execution
+                if job.running:
+                    job.skip(now)
+                else:
+                    job.running = True
+                    job.started(now)
+                    job.reschedule(now)
+                    self.due_jobs.put(job)
+                heapq.heappush(self.jobs, (job.deadline, next(self.sequence), job))
+
+        for _ in range(self.workers):
+            self.due_jobs.put(None)
+
+    def _work(self):
+        while True:
+            job = self.due_jobs.get()
+            if job is None:
+                break
+            job.run()
+
+
+class AsyncioJobScheduler:
+    # Runs all periodic jobs as asyncio tasks of a single event loop, in a dedicated thread. Blocking calls (sensors
+    # reading, rendering) are run in a small pool of worker threads, and serial requests are processed in order by a
+    # single writer thread, so that the event loop itself never blocks
+    def __init__(self, workers: int = WORKERS):
+        self.workers = workers
+        self.loop = asyncio.new_event_loop()
+        self.threads = []
+        self.stopping = False
+        self.stop_event = None
+
+        self.registered_jobs = []
+        self.job_tasks = []
+        self.queue_handler_task = None
+
+        # Blocking calls (func, args, future) waiting for a free worker thread / for the writer thread
+        self.calls = queue.Queue()
+        self.writes = queue.Queue()
+
+    def register(self, name: str, interval: float, func: Callable, *args, catch_up: bool = False) -> Job:
+        # Add a job run every interval seconds, first run is now. The scheduler is started if needed
+        job = Job(name, interval, func, args, catch_up)
+        self.registered_jobs.append(job)
+        self.loop.call_soon_threadsafe(lambda: self.job_tasks.append(self.loop.create_task(self._run_job(job))))
+        self.start()
+        return job
+
+    def run_queue_handler(self, handler: Callable):
+        # Run handler repeatedly from the writer thread until it returns False. Handler must wait for requests
+        def create_task():
+            self.queue_handler_task = self.loop.create_task(self._run_queue_handler(handler))
+
+        self.loop.call_soon_threadsafe(create_task)
+        self.start()
+
+    def stats(self) -> List[JobStats]:
+        return [job.stats() for job in self.registered_jobs]
+
+    def start(self):
+        if self.threads or self.stopping:
+            return
+        self.threads.append(threading.Thread(target=self.loop.run_until_complete, args=(self._main(),),
+                                             name="Job_Scheduler"))
+        for i in range(self.workers):
+            self.threads.append(threading.Thread(target=self._work, args=(self.calls,), name="Job_Worker_%d" % i))
+        self.threads.append(threading.Thread(target=self._work, args=(self.writes,), name="Queue_Handler"))
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self):
+        # Stop running jobs, then stop the queue handler once the action queue is empty. Running jobs are not interrupted
+        self.stopping = True
+        self.loop.call_soon_threadsafe(lambda: self.stop_event and self.stop_event.set())
+
+    async def _main(self):
+        self.stop_event = asyncio.Event()
+        if not self.stopping:
+            await self.stop_event.wait()
+
+        for task in self.job_tasks:
+            task.cancel()
+        if self.queue_handler_task:
+            await self.queue_handler_task
+
+        for _ in range(self.workers):
+            self.calls.put(None)
+        self.writes.put(None)
+
+    async def _run_job(self, job: Job):
+        while True:
+            now = time.monotonic()
+            job.started(now)
+            job.reschedule(now)
+            await self._call(self.calls, job.run)
+            await asyncio.sleep(max(job.deadline - time.monotonic(), 0))
+
+    async def _run_queue_handler(self, handler: Callable):
+        while True:
+            try:
+                if not await self._call(self.writes, handler):
+                    break
+            except Exception:
+                logger.exception("Error while sending requests to the display")
+
+    async def _call(self, calls: queue.Queue, func: Callable, *args):
+        # Run func(*args) in one of the threads processing calls, and wait for its result without blocking the loop
+        future = self.loop.create_future()
+        calls.put((func, args, future))
+        return await future
+
+    def _work(self, calls: queue.Queue):
+        while True:
+            call = calls.get()
+            if call is None:
+                break
+            (func, args, future) = call
+            try:
+                result = func(*args)
+                self.loop.call_soon_threadsafe(self._set_result, future, result, None)
+            except Exception as e:
+                self.loop.call_soon_threadsafe(self._set_result, future, None, e)
+
+    @staticmethod
+    def _set_result(future: asyncio.Future, result, exception):
+        if future.cancelled():
+            return
+        if exception:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+
+
+class FrameTicker:
+    # Runs jobs in frame ticks, from a single job of the job scheduler: at each tick, all jobs due during the tick are
+    # run one after another, then on_tick_end is called once (e.g. to send all areas of the display that changed)
+    def __init__(self, tick: float, on_tick_end: Callable):
+        self.tick = tick
+        self.on_tick_end = on_tick_end
+        self.jobs = []
+        # Job of the job scheduler running the ticks, set when the first job is registered
+        self.tick_job = None
+
+    def register(self, name: str, interval: float, func: Callable, *args, catch_up: bool = False) -> Job:
+        # Add a job run every interval seconds, rounded to the nearest tick. First run is at next tick
+        job = Job(name, interval, func, args, catch_up)
+        if self.tick_job is not None:
+            # First deadline is the start of next tick, so that jobs registered between two ticks are not seen as late
+            job.deadline = self.tick_job.deadline
+        self.jobs.append(job)
+        return job
+
+    def stats(self) -> List[JobStats]:
+        return [job.stats() for job in self.jobs]
+
+    def run(self):
+        now = time.monotonic()
+        for job in list(self.jobs):
+            # Jobs due before the middle of this tick are run now, the others will be closer to their deadline next tick
+            if job.deadline <= now + self.tick / 2:
+                job.started(now)
+                job.reschedule(now)
+                job.run()
+        self.on_tick_end()
+
+
+# Runtime used to run the jobs: THREADS (default) or ASYNCIO
+if config.CONFIG_DATA['config'].get("RUNTIME", "THREADS") == "ASYNCIO":
+    logger.info("Jobs will run on an asyncio event loop")
+    job_scheduler = AsyncioJobScheduler()
+else:
+    job_scheduler = JobScheduler()
+
+# Frame tick (s): if set, stats are refreshed in ticks and the display is updated once at the end of each tick
+FRAME_TICK = config.CONFIG_DATA['config'].get("FRAME_TICK", 0)
+frame_ticker = FrameTicker(FRAME_TICK, on_tick_end=lambda: display.lcd.RequestFrameBufferFlush()) if FRAME_TICK else None
+
+
+def register(name: str, interval: float, func: Callable, *args, catch_up: bool = False) -> Job:
+    # Run func(*args) every interval seconds with the shared job scheduler, or in frame ticks if enabled
+    if frame_ticker:
+        if not frame_ticker.jobs:
+            # First job: the display is now only updated at the end of each tick
+            logger.info("Stats will be refreshed in frame ticks of %ss" % FRAME_TICK)
+            display.lcd.flush_on_update = False
+            frame_ticker.tick_job = job_scheduler.register("Frame_Tick", FRAME_TICK, frame_ticker.run)
+        return frame_ticker.register(name, interval, func, *args, catch_up=catch_up)
+    return job_scheduler.register(name, interval, func, *args, catch_up=catch_up)
+
+
+def log_stats():
+    job_stats_list = job_scheduler.stats() + (frame_ticker.stats() if frame_ticker else [])
+    for job_stats in job_stats_list:
+        logger.debug("Job %s: %d runs, %d overruns, period %.3fs (expected %.3fs), lateness p50 %.1fms / p99 %.1fms" % (
+            job_stats.name, job_stats.runs, job_stats.overruns, job_stats.period, job_stats.interval,
+            job_stats.lateness_p50 * 1000, job_stats.lateness_p99 * 1000))
+    for cache_stats in sensors_cache.cache.stats():
+        logger.debug("Sensor %s: %d reads, %d from cache, %d stale%s" % (
+            cache_stats.metric, cache_stats.misses, cache_stats.hits, cache_stats.stale,
+            " (demoted)" if cache_stats.demoted else ""))
+    # Frames dropped because the display was too slow (e.g. flaky USB connection): their content was sent with a later
+    # frame, but the display was refreshed less often
+    logger.debug("Display queue: %d frames dropped (%d bytes), %d requests superseded" % (
+        config.update_queue.dropped_count, config.update_queue.dropped_bytes, config.update_queue.superseded_count))
+
+
+def stop():
+    # Stop running jobs, then stop the queue handler once the actions already in the queue are done
+    global STOPPING
+    if STOPPING:
+        return
+    STOPPING = True
+    job_scheduler.stop()
+    config.update_queue.put(STOP_REQUEST)
+    log_stats()
+
+
+def job(name: str, interval: float, catch_up: bool = False):
+    """ wrapper to run a function periodically with the job scheduler, once the wrapped function is called """
+
+    def decorator(func):
+        @wraps(func)
+        def register_job() -> Job:
+            return register(name, interval, func, catch_up=catch_up)
+
+        return register_job
+
+    return decorator
+
 
 def async_job(threadname=None):
     """ wrapper to handle asynchronous threads """
@@ -69,7 +465,7 @@ def schedule(interval):
                 **kwargs
         ):
             """ Wrapper to create our schedule and run it at the appropriate time """
-            scheduler = sched.scheduler(time.time, time.sleep)
+            scheduler = sched.scheduler(time.monotonic, time.sleep)
             periodic(scheduler, interval, func)
             scheduler.run()
 
@@ -78,89 +474,96 @@ def schedule(interval):
     return decorator
 
 
-@async_job("CPU_Percentage")
-@schedule(timedelta(seconds=config.THEME_DATA['STATS']['CPU']['PERCENTAGE'].get("INTERVAL", None)).total_seconds())
+@job("CPU_Percentage",
+     timedelta(seconds=config.THEME_DATA['STATS']['CPU']['PERCENTAGE'].get("INTERVAL", None)).total_seconds())
 def CPUPercentage():
     """ Refresh the CPU Percentage """
     # logger.debug("Refresh CPU Percentage")
     stats.CPU.percentage()
 
 
-@async_job("CPU_Frequency")
-@schedule(timedelta(seconds=config.THEME_DATA['STATS']['CPU']['FREQUENCY'].get("INTERVAL", None)).total_seconds())
+@job("CPU_Frequency",
+     timedelta(seconds=config.THEME_DATA['STATS']['CPU']['FREQUENCY'].get("INTERVAL", None)).total_seconds())
 def CPUFrequency():
     """ Refresh the CPU Frequency """
     # logger.debug("Refresh CPU Frequency")
     stats.CPU.frequency()
 
 
-@async_job("CPU_Load")
-@schedule(timedelta(seconds=config.THEME_DATA['STATS']['CPU']['LOAD'].get("INTERVAL", None)).total_seconds())
+@job("CPU_Load",
+     timedelta(seconds=config.THEME_DATA['STATS']['CPU']['LOAD'].get("INTERVAL", None)).total_seconds())
 def CPULoad():
     """ Refresh the CPU Load """
     # logger.debug("Refresh CPU Load")
     stats.CPU.load()
 
 
-@async_job("CPU_Load")
-@schedule(timedelta(seconds=config.THEME_DATA['STATS']['CPU']['TEMPERATURE'].get("INTERVAL", None)).total_seconds())
+@job("CPU_Temperature",
+     timedelta(seconds=config.THEME_DATA['STATS']['CPU']['TEMPERATURE'].get("INTERVAL", None)).total_seconds())
 def CPUTemperature():
     """ Refresh the CPU Temperature """
     # logger.debug("Refresh CPU Temperature")
     stats.CPU.temperature()
 
 
-@async_job("GPU_Stats")
-@schedule(timedelta(seconds=config.THEME_DATA['STATS']['GPU'].get("INTERVAL", None)).total_seconds())
+@job("GPU_Stats",
+     timedelta(seconds=config.THEME_DATA['STATS']['GPU'].get("INTERVAL", None)).total_seconds())
 def GpuStats():
     """ Refresh the GPU Stats """
     # logger.debug("Refresh GPU Stats")
     stats.Gpu.stats()
 
 
-@async_job("Memory_Stats")
-@schedule(timedelta(seconds=config.THEME_DATA['STATS']['MEMORY'].get("INTERVAL", None)).total_seconds())
+@job("Memory_Stats",
+     timedelta(seconds=config.THEME_DATA['STATS']['MEMORY'].get("INTERVAL", None)).total_seconds())
 def MemoryStats():
     # logger.debug("Refresh memory stats")
     stats.Memory.stats()
 
 
-@async_job("Disk_Stats")
-@schedule(timedelta(seconds=config.THEME_DATA['STATS']['DISK'].get("INTERVAL", None)).total_seconds())
+@job("Disk_Stats",
+     timedelta(seconds=config.THEME_DATA['STATS']['DISK'].get("INTERVAL", None)).total_seconds())
 def DiskStats():
     # logger.debug("Refresh disk stats")
     stats.Disk.stats()
 
 
-@async_job("Net_Stats")
-@schedule(timedelta(seconds=config.THEME_DATA['STATS']['NET'].get("INTERVAL", None)).total_seconds())
+@job("Net_Stats",
+     timedelta(seconds=config.THEME_DATA['STATS']['NET'].get("INTERVAL", None)).total_seconds())
 def NetStats():
     # logger.debug("Refresh net stats")
     stats.Net.stats()
 
 
-@async_job("Date_Stats")
-@schedule(timedelta(seconds=config.THEME_DATA['STATS']['DATE'].get("INTERVAL", None)).total_seconds())
+@job("Date_Stats",
+     timedelta(seconds=config.THEME_DATA['STATS']['DATE'].get("INTERVAL", None)).total_seconds())
 def DateStats():
     # logger.debug("Refresh date stats")
     stats.Date.stats()
 
 
+def HandleQueue() -> bool:
+    # Do all actions waiting in the queue, return False once the queue handler must stop
+    return LcdComm.ProcessQueue(config.update_queue)
+
+
 @async_job("Queue_Handler")
-@schedule(timedelta(milliseconds=1).total_seconds())
+def QueueHandlerThread():
+    # Wait for actions in the queue and do them, without polling. A failing request must not stop the queue handler
+    while True:
+        try:
+            if not HandleQueue():
+                break
+        except Exception:
+            logger.exception("Error while sending requests to the display")
+
+
 def QueueHandler():
-    # Do next action waiting in the queue
-    global STOPPING
-    if STOPPING:
-        # Empty the action queue to allow program to exit cleanly
-        while not config.update_queue.empty():
-            f, args = config.update_queue.get()
-            f(*args)
+    # Process the requests of the action queue in the background
+    if isinstance(job_scheduler, AsyncioJobScheduler):
+        job_scheduler.run_queue_handler(HandleQueue)
     else:
-        # Execute first action in the queue
-        f, args = config.update_queue.get()
-        if f:
-            f(*args)
+        QueueHandlerThread()
 
 
 def is_queue_empty() -> bool:
@@ -20,7 +20,51 @@
 # To be overriden by child sensors classes
 
 from abc import ABC, abstractmethod
-from typing import Tuple
+import math
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+
+# Snapshots of a subsystem, read from a single underlying call so that all values are consistent
+class GpuDeviceStats(NamedTuple):
+    load: float  # %
+    memory_used_mb: float
+    memory_total_mb: float
+    temperature: float  # °C
+
+
+def average_gpu_stats(gpus: List[GpuDeviceStats]) -> Tuple[float, float, float, float]:
+    # Average stats of all GPUs: load (%) / used mem (%) / used mem (Mb) / temp (°C)
+    if not gpus:
+        return math.nan, math.nan, math.nan, math.nan
+    load = sum(gpu.load for gpu in gpus) / len(gpus)
+    memory_used_mb = sum(gpu.memory_used_mb for gpu in gpus) / len(gpus)
+    memory_total_mb = sum(gpu.memory_total_mb for gpu in gpus) / len(gpus)
+    try:
+        memory_percentage = memory_used_mb / memory_total_mb * 100
+    except ZeroDivisionError:
+        memory_percentage = math.nan
+    temperature = sum(gpu.temperature for gpu in gpus) / len(gpus)
+    return load, memory_percentage, memory_used_mb, temperature
+
+
+class MemoryStats(NamedTuple):
+    swap_percent: float
+    virtual_percent: float
+    virtual_used: int  # In bytes
+    virtual_free: int  # In bytes
+
+
+class DiskStats(NamedTuple):
+    usage_percent: float
+    used: int  # In bytes
+    free: int  # In bytes
+
+
+class NetStats(NamedTuple):
+    upload_rate: float  # In bytes/s
+    uploaded: int  # In bytes
+    download_rate: float  # In bytes/s
+    downloaded: int  # In bytes
 
 
 class Cpu(ABC):
@@ -61,44 +105,66 @@ class Gpu(ABC):
     def is_available() -> bool:
         pass
 
-
-class Memory(ABC):
+    # Refresh interval (s) of the GPU stats: to be overriden by sensors sampling GPUs in the background
     @staticmethod
-    @abstractmethod
-    def swap_percent() -> float:
+    def set_interval(interval: float):
         pass
 
-    @staticmethod
-    @abstractmethod
-    def virtual_percent() -> float:
-        pass
+    # Stats of each GPU: to be overriden by sensors able to read GPUs separately, otherwise average stats are returned
+    # as a single GPU
+    @classmethod
+    def devices_stats(cls) -> List[GpuDeviceStats]:
+        load, memory_percentage, memory_used_mb, temperature = cls.stats()
+        try:
+            memory_total_mb = memory_used_mb / memory_percentage * 100
+        except ZeroDivisionError:
+            memory_total_mb = math.nan
+        return [GpuDeviceStats(load, memory_used_mb, memory_total_mb, temperature)]
 
-    @staticmethod
-    @abstractmethod
-    def virtual_used() -> int:  # In bytes
-        pass
 
+class Memory(ABC):
     @staticmethod
     @abstractmethod
-    def virtual_free() -> int:  # In bytes
+    def stats(swap: bool = True, virtual: bool = True) -> MemoryStats:
+        # Backends may skip reading swap / virtual memory stats that are not requested: their values are then NaN / 0
         pass
 
+    # Per-value accessors: prefer stats() to get several values at once
+    @classmethod
+    def swap_percent(cls) -> float:
+        return cls.stats(virtual=False).swap_percent
+
+    @classmethod
+    def virtual_percent(cls) -> float:
+        return cls.stats(swap=False).virtual_percent
+
+    @classmethod
+    def virtual_used(cls) -> int:  # In bytes
+        return cls.stats(swap=False).virtual_used
+
+    @classmethod
+    def virtual_free(cls) -> int:  # In bytes
+        return cls.stats(swap=False).virtual_free
+
 
 class Disk(ABC):
     @staticmethod
     @abstractmethod
-    def disk_usage_percent() -> float:
+    def stats() -> DiskStats:
         pass
 
-    @staticmethod
-    @abstractmethod
-    def disk_used() -> int:  # In bytes
-        pass
+    # Per-value accessors: prefer stats() to get several values at once
+    @classmethod
+    def disk_usage_percent(cls) -> float:
+        return cls.stats().usage_percent
 
-    @staticmethod
-    @abstractmethod
-    def disk_free() -> int:  # In bytes
-        pass
+    @classmethod
+    def disk_used(cls) -> int:  # In bytes
+        return cls.stats().used
+
+    @classmethod
+    def disk_free(cls) -> int:  # In bytes
+        return cls.stats().free
 
 
 class Net(ABC):
@@ -107,3 +173,8 @@ class Net(ABC):
     def stats(if_name, interval) -> Tuple[
         int, int, int, int]:  # up rate (B/s), uploaded (B), dl rate (B/s), downloaded (B)
         pass
+
+    # Stats of several interfaces: to be overriden by sensors able to read all interfaces at once
+    @classmethod
+    def interfaces_stats(cls, if_names: Sequence[str]) -> Dict[str, NetStats]:
+        return {if_name: NetStats(*cls.stats(if_name, None)) for if_name in if_names}
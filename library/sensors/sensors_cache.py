@@ -0,0 +1,262 @@
+# turing-smart-screen-python - a Python system monitor and library for 3.5" USB-C displays like Turing Smart Screen or XuanFang
+# https://github.com/mathoudebine/turing-smart-screen-python/
+
+# Copyright (C) 2021-2023  Matthieu Houdebine (mathoudebine)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# This file defines a cache shared by all consumers of the sensors, so that the same data is not read several times
+# from the hardware when different widgets or displays need it at the same time
+# Each metric (e.g. "Memory.stats") has its own time-to-live. While a value is being read, other threads asking for
+# the same value wait for this read instead of starting another one
+# Metrics can also have a deadline: they are then read by a small pool of reader threads, and a read that does not end
+# before its deadline returns the last value read (marked as stale) instead of blocking the caller. Metrics that keep
+# missing their deadline are demoted: they are read less often until a read ends in time again
+
+import queue
+import threading
+import time
+from typing import Any, Callable, List, NamedTuple, Optional
+
+from library.log import logger
+
+# Max. number of threads reading metrics with a deadline at the same time
+READ_WORKERS = 4
+
+# A metric is demoted after missing its deadline this number of times in a row
+DEMOTE_AFTER = 3
+
+# Demoted metrics are read DEMOTION_FACTOR times less often
+DEMOTION_FACTOR = 4
+
+
+class SensorTimeout(TimeoutError):
+    # Raised when a read misses its deadline and there is no previous value to return instead
+    pass
+
+
+class CacheStats(NamedTuple):
+    metric: str
+    hits: int  # Values returned from the cache or shared with a read in progress
+    misses: int  # Values actually read from the sensors
+    stale: int  # Values returned from a previous read because the read missed its deadline
+    demoted: bool  # Metric is read less often because it keeps missing its deadline
+
+
+class _Read:
+    # A read in progress, shared by all threads asking for the same value meanwhile
+    def __init__(self):
+        self.done = threading.Event()
+        self.start = time.monotonic()
+        self.value = None
+        self.error = None
+        self.missed_deadlines = 0  # Number of deadlines this read has already been counted as missing
+
+
+class _Entry:
+    def __init__(self):
+        self.value = None
+        self.timestamp = None  # Monotonic time when the value was read, None if there is no valid value
+        self.read = None  # Read in progress if any
+        self.stale = False  # Last value returned comes from a previous read because a read missed its deadline
+
+
+class SensorCache:
+    def __init__(self, read_workers: int = READ_WORKERS):
+        # Time-to-live (s) of the values of each metric. Metrics without TTL are never reused once read, but concurrent
+        # reads are still shared
+        self.ttls = {}
+        # Max. time (s) callers wait for a read of each metric. Metrics without deadline are read by the caller thread
+        self.deadlines = {}
+
+        self.entries = {}
+        self.hits = {}
+        self.misses = {}
+        self.stale = {}
+        self.missed_deadlines = {}  # Metric -> number of deadlines missed in a row
+        self.demoted = set()
+        self.mutex = threading.Lock()
+
+        # Reads waiting for a free reader thread. Reader threads are daemon threads: a read that never ends does not
+        # prevent the program from exiting
+        self.read_workers = read_workers
+        self.reads = queue.Queue()
+        self.threads = []
+
+    def set_ttl(self, metric: str, ttl: float):
+        with self.mutex:
+            self.ttls[metric] = ttl
+
+    def set_deadline(self, metric: str, deadline: Optional[float]):
+        # A None deadline removes the deadline of the metric
+        with self.mutex:
+            self.deadlines[metric] = deadline
+
+    def _ttl(self, metric: str) -> float:
+        ttl = self.ttls.get(metric, 0)
+        if metric in self.demoted:
+            ttl = max(ttl, self.deadlines.get(metric, 0)) * DEMOTION_FACTOR
+        return ttl
+
+    def get(self, metric: str, read: Callable, *args, **kwargs) -> Any:
+        # Return the value of read(*args, **kwargs) from the cache if it is recent enough, otherwise read it
+        key = (metric, args, tuple(sorted(kwargs.items())))
+
+        with self.mutex:
+            entry = self.entries.get(key)
+            if entry is None:
+                entry = self.entries[key] = _Entry()
+
+            if entry.read is None and entry.timestamp is not None and \
+                    time.monotonic() - entry.timestamp < self._ttl(metric):
+                self.hits[metric] = self.hits.get(metric, 0) + 1
+                return entry.value
+
+            if entry.read is not None:
+                # Another thread is reading this value: wait for its result
+                self.hits[metric] = self.hits.get(metric, 0) + 1
+                started = False
+            else:
+                self.misses[metric] = self.misses.get(metric, 0) + 1
+                started = True
+                entry.read = _Read()
+            current_read = entry.read
+            deadline = self.deadlines.get(metric)
+
+        if started:
+            if deadline is None:
+                self._read(metric, entry, current_read, read, args, kwargs)
+            else:
+                self._start_reader_threads()
+                self.reads.put((metric, entry, current_read, read, args, kwargs))
+
+        # Callers waiting for a read in progress only wait until the deadline of this read
+        if not current_read.done.wait(
+                None if deadline is None else max(current_read.start + deadline - time.monotonic(), 0)):
+            return self._missed_deadline(metric, entry, current_read, deadline)
+        if current_read.error is not None:
+            raise current_read.error
+        return current_read.value
+
+    def _read(self, metric: str, entry: _Entry, current_read: _Read, read: Callable, args: tuple, kwargs: dict):
+        # TTL starts when the value is sampled, not when the read ends
+        timestamp = time.monotonic()
+        try:
+            current_read.value = read(*args, **kwargs)
+        except Exception as e:
+            # Errors are not cached: next call will try to read the value again
+            current_read.error = e
+        else:
+            with self.mutex:
+                entry.value = current_read.value
+                entry.timestamp = timestamp
+                entry.stale = False
+        finally:
+            with self.mutex:
+                entry.read = None
+                deadline = self.deadlines.get(metric)
+                if deadline is not None and time.monotonic() - timestamp <= deadline:
+                    self.missed_deadlines[metric] = 0
+                    if metric in self.demoted:
+                        self.demoted.discard(metric)
+                        logger.info("Sensor %s is fast again, it is read at its normal interval" % metric)
+            current_read.done.set()
+
+    def _missed_deadline(self, metric: str, entry: _Entry, current_read: _Read, deadline: float) -> Any:
+        # Return the previous value of a read that did not end in time, and demote the metric if it is always late
+        with self.mutex:
+            # A read misses one more deadline each time its age reaches another multiple of the deadline, so that a read
+            # that never ends gets the metric demoted too. Callers waiting for the same read at the same time only
+            # count its missed deadlines once
+            age = time.monotonic() - current_read.start
+            missed = max(int(age / deadline), 1) if deadline > 0 else 1
+            if missed > current_read.missed_deadlines:
+                new_missed = missed - current_read.missed_deadlines
+                current_read.missed_deadlines = missed
+                self.missed_deadlines[metric] = self.missed_deadlines.get(metric, 0) + new_missed
+                if self.missed_deadlines[metric] >= DEMOTE_AFTER and metric not in self.demoted:
+                    self.demoted.add(metric)
+                    logger.warning("Sensor %s is too slow (more than %.2fs), it will be read less often" % (
+                        metric, deadline))
+            if entry.timestamp is None:
+                raise SensorTimeout("Sensor %s did not answer within %.2fs" % (metric, deadline))
+            self.stale[metric] = self.stale.get(metric, 0) + 1
+            entry.stale = True
+            return entry.value
+
+    def _start_reader_threads(self):
+        with self.mutex:
+            if self.threads:
+                return
+            for i in range(self.read_workers):
+                self.threads.append(threading.Thread(target=self._work, name="Sensor_Reader_%d" % i, daemon=True))
+            for thread in self.threads:
+                thread.start()
+
+    def _work(self):
+        while True:
+            (metric, entry, current_read, read, args, kwargs) = self.reads.get()
+            self._read(metric, entry, current_read, read, args, kwargs)
+
+    def is_stale(self, metric: str, *args, **kwargs) -> bool:
+        # True if the last value returned for this metric comes from a previous read, because a read missed its deadline
+        with self.mutex:
+            entry = self.entries.get((metric, args, tuple(sorted(kwargs.items()))))
+            return entry is not None and entry.stale
+
+    def stats(self) -> List[CacheStats]:
+        with self.mutex:
+            return [CacheStats(metric, self.hits.get(metric, 0), self.misses.get(metric, 0), self.stale.get(metric, 0),
+                               metric in self.demoted)
+                    for metric in sorted(set(self.hits) | set(self.misses))]
+
+
+class CachedSensor:
+    # Proxy of a sensor class of a backend (e.g. sensors_python.Memory): calls to its methods go through the cache,
+    # the metric of a method being "<class name>.<method name>"
+    def __init__(self, sensor: type, sensor_cache: SensorCache):
+        self.sensor = sensor
+        self.cache = sensor_cache
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self.sensor, name)
+        if not callable(attribute):
+            return attribute
+
+        metric = self.sensor.__name__ + "." + name
+
+        def cached_call(*args, **kwargs):
+            return self.cache.get(metric, attribute, *args, **kwargs)
+
+        return cached_call
+
+
+class CachedSensors:
+    # Proxy of a sensors backend module (e.g. library.sensors.sensors_python) giving access to its cached sensor classes
+    def __init__(self, backend, sensor_cache: SensorCache):
+        self.backend = backend
+        self.cache = sensor_cache
+        self.sensors = {}
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self.backend, name)
+        if not isinstance(attribute, type):
+            return attribute
+        if name not in self.sensors:
+            self.sensors[name] = CachedSensor(attribute, self.cache)
+        return self.sensors[name]
+
+
+# Cache shared by all the sensors
+cache = SensorCache()
@@ -0,0 +1,123 @@
+# turing-smart-screen-python - a Python system monitor and library for 3.5" USB-C displays like Turing Smart Screen or XuanFang
+# https://github.com/mathoudebine/turing-smart-screen-python/
+
+# Copyright (C) 2021-2023  Matthieu Houdebine (mathoudebine)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# This file reads temperatures directly from the Linux sysfs hwmon interface (/sys/class/hwmon)
+# Temperature inputs are discovered once and their files are kept open: reading a temperature is then a single pread()
+# of a small file, instead of walking and parsing all hwmon entries on each call like psutil.sensors_temperatures()
+# If there is no hwmon temperature input, thermal zones (/sys/class/thermal) are used instead, like psutil does
+
+import glob
+import os
+import re
+from typing import Dict, List, Tuple
+
+# Chips giving the CPU temperature, by order of preference
+CPU_CHIPS = ["coretemp", "k10temp", "zenpower", "cpu_thermal", "cpu-thermal", "soc_thermal", "x86_pkg_temp"]
+
+
+def _pread(fd: int, size: int) -> bytes:
+    if hasattr(os, "pread"):
+        return os.pread(fd, size, 0)
+    # pread() is not available on all platforms
+    os.lseek(fd, 0, os.SEEK_SET)
+    return os.read(fd, size)
+
+
+def _read_text(path: str) -> str:
+    try:
+        with open(path, "rt") as stream:
+            return stream.read().strip()
+    except OSError:
+        return ""
+
+
+def _input_number(path: str) -> int:
+    # temp12_input -> 12, so that inputs are sorted by number
+    match = re.search(r"temp(\d+)_input$", path)
+    return int(match.group(1)) if match else 0
+
+
+class HwmonInput:
+    def __init__(self, chip: str, label: str, path: str):
+        self.chip = chip
+        self.label = label
+        self.path = path
+        self.fd = os.open(path, os.O_RDONLY)
+
+    def read(self) -> float:
+        # Temperature in °C. Raise OSError / ValueError if the sensor cannot be read
+        return int(_pread(self.fd, 32)) / 1000.0
+
+    def close(self):
+        os.close(self.fd)
+
+
+class HwmonReader:
+    def __init__(self, sysfs_root: str = "/sys"):
+        # Temperature inputs of each chip, in the same order as psutil.sensors_temperatures()
+        self.chips = {}  # Chip name -> list of HwmonInput
+
+        for hwmon in sorted(glob.glob(os.path.join(sysfs_root, "class", "hwmon", "hwmon*"))):
+            chip = _read_text(os.path.join(hwmon, "name"))
+            # Some distributions have an intermediate device directory
+            paths = (glob.glob(os.path.join(hwmon, "temp*_input")) +
+                     glob.glob(os.path.join(hwmon, "device", "temp*_input")))
+            for path in sorted(paths, key=_input_number):
+                self._add_input(chip, _read_text(path[:-len("_input")] + "_label"), path)
+
+        if not self.chips:
+            for zone in sorted(glob.glob(os.path.join(sysfs_root, "class", "thermal", "thermal_zone*"))):
+                self._add_input(_read_text(os.path.join(zone, "type")), "", os.path.join(zone, "temp"))
+
+        # Input giving the CPU temperature: first input of the preferred CPU chip
+        self.cpu_input = None
+        for chip in CPU_CHIPS:
+            if self.chips.get(chip):
+                self.cpu_input = self.chips[chip][0]
+                break
+
+    def _add_input(self, chip: str, label: str, path: str):
+        if not chip:
+            return
+        try:
+            hwmon_input = HwmonInput(chip, label, path)
+        except OSError:
+            # Entries that cannot be opened are ignored, like psutil does
+            return
+        self.chips.setdefault(chip, []).append(hwmon_input)
+
+    def cpu_temperature(self) -> float:
+        return self.cpu_input.read()
+
+    def temperatures(self) -> Dict[str, List[Tuple[str, float]]]:
+        # All temperatures (label, °C) of each chip, skipping the inputs that cannot be read
+        temperatures = {}
+        for (chip, inputs) in self.chips.items():
+            for hwmon_input in inputs:
+                try:
+                    temperatures.setdefault(chip, []).append((hwmon_input.label, hwmon_input.read()))
+                except (OSError, ValueError):
+                    pass
+        return temperatures
+
+    def close(self):
+        for inputs in self.chips.values():
+            for hwmon_input in inputs:
+                hwmon_input.close()
+        self.chips = {}
+        self.cpu_input = None
@@ -0,0 +1,109 @@
+# turing-smart-screen-python - a Python system monitor and library for 3.5" USB-C displays like Turing Smart Screen or XuanFang
+# https://github.com/mathoudebine/turing-smart-screen-python/
+
+# Copyright (C) 2021-2023  Matthieu Houdebine (mathoudebine)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# This file indexes the hardware and sensors found by LibreHardwareMonitor, so that sensors are found without walking
+# all hardware and sensors on each read
+# Each hardware is updated at most once per update period, even if several of its sensors are read
+# This file does not depend on LibreHardwareMonitor itself: the Hardware namespace of LibreHardwareMonitor (or any
+# object with the same HardwareType / SensorType attributes) and the list of hardware are given to the registry
+
+import math
+import threading
+import time
+from typing import Any, List, Optional
+
+# Min. period (s) between two updates of the same hardware: sensors read during the same refresh share one update
+UPDATE_PERIOD = 0.5
+
+
+class HardwareNode:
+    def __init__(self, hardware: Any, update_period: float):
+        self.hardware = hardware
+        self.name = str(hardware.Name)
+        self.update_period = update_period
+        self.last_update = None
+        self.mutex = threading.Lock()
+
+        # Hardware is updated once so that all sensors are available, before indexing them
+        self.update()
+        self.sensors = {}  # (sensor type, name) -> sensor
+        self.sensors_by_type = {}  # sensor type -> sensors, in LibreHardwareMonitor order
+        for sensor in hardware.Sensors:
+            self.sensors.setdefault((sensor.SensorType, str(sensor.Name)), sensor)
+            self.sensors_by_type.setdefault(sensor.SensorType, []).append(sensor)
+
+        # Sensors found by name prefix, to avoid walking sensors again for the same prefix
+        self.sensors_by_prefix = {}  # (sensor type, prefix) -> sensor or None
+
+    def update(self):
+        with self.mutex:
+            now = time.monotonic()
+            if self.last_update is None or now - self.last_update >= self.update_period:
+                self.hardware.Update()
+                self.last_update = now
+
+    def sensor(self, sensor_type: Any, name: str) -> Optional[Any]:
+        # Sensor with this exact name, or else the first sensor whose name starts with name. None if there is none.
+        # Hardware is updated if needed, so that the sensor value is up-to-date
+        self.update()
+        sensor = self.sensors.get((sensor_type, name))
+        if sensor is None:
+            key = (sensor_type, name)
+            if key not in self.sensors_by_prefix:
+                self.sensors_by_prefix[key] = next((s for s in self.sensors_by_type.get(sensor_type, [])
+                                                    if str(s.Name).startswith(name)), None)
+            sensor = self.sensors_by_prefix[key]
+        return sensor
+
+    def value(self, sensor_type: Any, name: str) -> float:
+        # Value of the sensor (see sensor()), NaN if there is no such sensor or it has no value
+        sensor = self.sensor(sensor_type, name)
+        if sensor is None or sensor.Value is None:
+            return math.nan
+        return float(sensor.Value)
+
+    def sensors_of_type(self, sensor_type: Any) -> List[Any]:
+        self.update()
+        return self.sensors_by_type.get(sensor_type, [])
+
+
+class LhmRegistry:
+    def __init__(self, hardware_list: List[Any], update_period: float = UPDATE_PERIOD):
+        self.nodes = [HardwareNode(hardware, update_period) for hardware in hardware_list]
+        self.nodes_by_type = {}  # hardware type -> nodes, in LibreHardwareMonitor order
+        self.nodes_by_name = {}  # (hardware type, name) -> node
+        for node in self.nodes:
+            self.nodes_by_type.setdefault(node.hardware.HardwareType, []).append(node)
+            self.nodes_by_name.setdefault((node.hardware.HardwareType, node.name), node)
+
+    def hardware(self, hardware_type: Any, name: str = None) -> Optional[HardwareNode]:
+        # Hardware with this name, or first hardware of this type if no name is given. None if there is none
+        if name is not None:
+            return self.nodes_by_name.get((hardware_type, name))
+        nodes = self.nodes_by_type.get(hardware_type)
+        return nodes[0] if nodes else None
+
+    def sensor(self, hardware_type: Any, sensor_type: Any, name: str) -> Optional[Any]:
+        # Sensor of the first hardware of this type (see HardwareNode.sensor())
+        node = self.hardware(hardware_type)
+        return node.sensor(sensor_type, name) if node else None
+
+    def value(self, hardware_type: Any, sensor_type: Any, name: str) -> float:
+        # Sensor value of the first hardware of this type (see HardwareNode.value())
+        node = self.hardware(hardware_type)
+        return node.value(sensor_type, name) if node else math.nan
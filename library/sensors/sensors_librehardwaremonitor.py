@@ -33,6 +33,7 @@ from win32api import *
 
 import library.sensors.sensors as sensors
 from library.log import logger
+from library.sensors.sensors_lhm_registry import LhmRegistry, HardwareNode
 
 # Import LibreHardwareMonitor dll to Python
 lhm_dll = os.getcwd() + '\\external\\LibreHardwareMonitor\\LibreHardwareMonitorLib.dll'
@@ -87,31 +88,29 @@ for hardware in handle.Hardware:
         logger.info("Found Network interface: %s" % hardware.Name)
 
 
-def get_hw_and_update(hwtype: Hardware.HardwareType) -> Hardware.Hardware:
-    for hardware in handle.Hardware:
-        if hardware.HardwareType == hwtype:
-            hardware.Update()
-            return hardware
-    return None
+# Index hardware and sensors once, so that metrics do not walk all hardware and sensors on each read
+registry = LhmRegistry(handle.Hardware)
 
 
-def get_net_interface_and_update(if_name: str) -> Hardware.Hardware:
-    for hardware in handle.Hardware:
-        if hardware.HardwareType == Hardware.HardwareType.Network and hardware.Name == if_name:
-            hardware.Update()
-            return hardware
+def get_hw_and_update(hwtype: Hardware.HardwareType) -> HardwareNode:
+    # Hardware sensors are updated when they are read, at most once per registry update period
+    return registry.hardware(hwtype)
 
-    logger.warning("Network interface '%s' not found. Check names in config.yaml." % if_name)
-    return None
+
+def get_net_interface_and_update(if_name: str) -> HardwareNode:
+    net_if = registry.hardware(Hardware.HardwareType.Network, if_name)
+    if net_if is None:
+        logger.warning("Network interface '%s' not found. Check names in config.yaml." % if_name)
+    return net_if
 
 
 class Cpu(sensors.Cpu):
     @staticmethod
     def percentage(interval: float) -> float:
         cpu = get_hw_and_update(Hardware.HardwareType.Cpu)
-        for sensor in cpu.Sensors:
-            if sensor.SensorType == Hardware.SensorType.Load and str(sensor.Name).startswith("CPU Total"):
-                return float(sensor.Value)
+        sensor = cpu.sensor(Hardware.SensorType.Load, "CPU Total")
+        if sensor is not None:
+            return float(sensor.Value)
 
         logger.error("CPU load cannot be read")
         return math.nan
@@ -120,12 +119,11 @@ class Cpu(sensors.Cpu):
     def frequency() -> float:
         frequencies = []
         cpu = get_hw_and_update(Hardware.HardwareType.Cpu)
-        for sensor in cpu.Sensors:
-            if sensor.SensorType == Hardware.SensorType.Clock:
-                # Keep only real core clocks, ignore effective core clocks
-                if "Core #" in str(sensor.Name) and "Effective" not in str(sensor.Name):
-                    if sensor.Value:
-                        frequencies.append(float(sensor.Value))
+        for sensor in cpu.sensors_of_type(Hardware.SensorType.Clock):
+            # Keep only real core clocks, ignore effective core clocks
+            if "Core #" in str(sensor.Name) and "Effective" not in str(sensor.Name):
+                if sensor.Value:
+                    frequencies.append(float(sensor.Value))
 
         if frequencies:
             # Take mean of all core clock as "CPU clock" (as it is done in Windows Task Manager Performance tab)
@@ -142,31 +140,19 @@ class Cpu(sensors.Cpu):
     @staticmethod
     def is_temperature_available() -> bool:
         cpu = get_hw_and_update(Hardware.HardwareType.Cpu)
-        for sensor in cpu.Sensors:
-            if sensor.SensorType == Hardware.SensorType.Temperature:
-                if str(sensor.Name).startswith("Core") or str(sensor.Name).startswith("CPU Package"):
-                    return True
-
-        return False
+        return cpu.sensor(Hardware.SensorType.Temperature, "Core") is not None or \
+            cpu.sensor(Hardware.SensorType.Temperature, "CPU Package") is not None
 
     @staticmethod
     def temperature() -> float:
         cpu = get_hw_and_update(Hardware.HardwareType.Cpu)
         # By default, the average temperature of all CPU cores will be used
-        for sensor in cpu.Sensors:
-            if sensor.SensorType == Hardware.SensorType.Temperature and str(sensor.Name).startswith("Core Average"):
-                return float(sensor.Value)
         # If not available, the max core temperature will be used
-        for sensor in cpu.Sensors:
-            if sensor.SensorType == Hardware.SensorType.Temperature and str(sensor.Name).startswith("Core Max"):
-                return float(sensor.Value)
         # If not available, the CPU Package temperature (usually same as max core temperature) will be used
-        for sensor in cpu.Sensors:
-            if sensor.SensorType == Hardware.SensorType.Temperature and str(sensor.Name).startswith("CPU Package"):
-                return float(sensor.Value)
         # Otherwise any sensor named "Core..." will be used
-        for sensor in cpu.Sensors:
-            if sensor.SensorType == Hardware.SensorType.Temperature and str(sensor.Name).startswith("Core"):
+        for name in ["Core Average", "Core Max", "CPU Package", "Core"]:
+            sensor = cpu.sensor(Hardware.SensorType.Temperature, name)
+            if sensor is not None:
                 return float(sensor.Value)
 
         return math.nan
@@ -184,25 +170,14 @@ class Gpu(sensors.Gpu):
             # GPU not supported
             return math.nan, math.nan, math.nan, math.nan
 
-        load = math.nan
-        used_mem = math.nan
-        total_mem = math.nan
-        temp = math.nan
-
-        for sensor in gpu_to_use.Sensors:
-            if sensor.SensorType == Hardware.SensorType.Load and str(sensor.Name).startswith("GPU Core"):
-                load = float(sensor.Value)
-            elif sensor.SensorType == Hardware.SensorType.SmallData and str(sensor.Name).startswith("GPU Memory Used"):
-                used_mem = float(sensor.Value)
-            elif sensor.SensorType == Hardware.SensorType.SmallData and str(sensor.Name).startswith(
-                    "D3D Dedicated Memory Used") and math.isnan(used_mem):
-                # Only use D3D memory usage if global "GPU Memory Used" sensor is not available, because it is less
-                # precise and does not cover the entire GPU: https://www.hwinfo.com/forum/threads/what-is-d3d-usage.759/
-                used_mem = float(sensor.Value)
-            elif sensor.SensorType == Hardware.SensorType.SmallData and str(sensor.Name).startswith("GPU Memory Total"):
-                total_mem = float(sensor.Value)
-            elif sensor.SensorType == Hardware.SensorType.Temperature and str(sensor.Name).startswith("GPU Core"):
-                temp = float(sensor.Value)
+        load = gpu_to_use.value(Hardware.SensorType.Load, "GPU Core")
+        used_mem = gpu_to_use.value(Hardware.SensorType.SmallData, "GPU Memory Used")
+        if math.isnan(used_mem):
+            # Only use D3D memory usage if global "GPU Memory Used" sensor is not available, because it is less
+            # precise and does not cover the entire GPU: https://www.hwinfo.com/forum/threads/what-is-d3d-usage.759/
+            used_mem = gpu_to_use.value(Hardware.SensorType.SmallData, "D3D Dedicated Memory Used")
+        total_mem = gpu_to_use.value(Hardware.SensorType.SmallData, "GPU Memory Total")
+        temp = gpu_to_use.value(Hardware.SensorType.Temperature, "GPU Core")
 
         return load, (used_mem / total_mem * 100.0), used_mem, temp
 
@@ -221,75 +196,36 @@ class Gpu(sensors.Gpu):
 
 class Memory(sensors.Memory):
     @staticmethod
-    def swap_percent() -> float:
+    def stats(swap: bool = True, virtual: bool = True) -> sensors.MemoryStats:
+        # All memory stats come from the same hardware update: they are always read
         memory = get_hw_and_update(Hardware.HardwareType.Memory)
 
-        virtual_mem_used = math.nan
-        mem_used = math.nan
-        virtual_mem_available = math.nan
-        mem_available = math.nan
-
-        # Get virtual / physical memory stats
-        for sensor in memory.Sensors:
-            if sensor.SensorType == Hardware.SensorType.Data and str(sensor.Name).startswith("Virtual Memory Used"):
-                virtual_mem_used = int(sensor.Value)
-            elif sensor.SensorType == Hardware.SensorType.Data and str(sensor.Name).startswith("Memory Used"):
-                mem_used = int(sensor.Value)
-            elif sensor.SensorType == Hardware.SensorType.Data and str(sensor.Name).startswith(
-                    "Virtual Memory Available"):
-                virtual_mem_available = int(sensor.Value)
-            elif sensor.SensorType == Hardware.SensorType.Data and str(sensor.Name).startswith("Memory Available"):
-                mem_available = int(sensor.Value)
+        # Get virtual / physical memory stats (in GB)
+        virtual_percent = memory.value(Hardware.SensorType.Load, "Memory")
+        virtual_mem_used = memory.value(Hardware.SensorType.Data, "Virtual Memory Used")
+        mem_used = memory.value(Hardware.SensorType.Data, "Memory Used")
+        virtual_mem_available = memory.value(Hardware.SensorType.Data, "Virtual Memory Available")
+        mem_available = memory.value(Hardware.SensorType.Data, "Memory Available")
 
         # Compute swap stats from virtual / physical memory stats
         swap_used = virtual_mem_used - mem_used
         swap_available = virtual_mem_available - mem_available
         swap_total = swap_used + swap_available
 
-        return swap_used / swap_total * 100.0
-
-    @staticmethod
-    def virtual_percent() -> float:
-        memory = get_hw_and_update(Hardware.HardwareType.Memory)
-        for sensor in memory.Sensors:
-            if sensor.SensorType == Hardware.SensorType.Load and str(sensor.Name).startswith("Memory"):
-                return float(sensor.Value)
-
-        return math.nan
-
-    @staticmethod
-    def virtual_used() -> int:  # In bytes
-        memory = get_hw_and_update(Hardware.HardwareType.Memory)
-        for sensor in memory.Sensors:
-            if sensor.SensorType == Hardware.SensorType.Data and str(sensor.Name).startswith("Memory Used"):
-                return int(sensor.Value * 1000000000.0)
-
-        return 0
-
-    @staticmethod
-    def virtual_free() -> int:  # In bytes
-        memory = get_hw_and_update(Hardware.HardwareType.Memory)
-        for sensor in memory.Sensors:
-            if sensor.SensorType == Hardware.SensorType.Data and str(sensor.Name).startswith("Memory Available"):
-                return int(sensor.Value * 1000000000.0)
-
-        return 0
+        return sensors.MemoryStats(
+            swap_percent=swap_used / swap_total * 100.0,
+            virtual_percent=virtual_percent,
+            virtual_used=int(mem_used * 1000000000.0) if not math.isnan(mem_used) else 0,
+            virtual_free=int(mem_available * 1000000000.0) if not math.isnan(mem_available) else 0)
 
 
 # NOTE: all disk data are fetched from psutil Python library, because LHM does not have it.
 # This is because LHM is a hardware-oriented library, whereas used/free/total space is for partitions, not disks
 class Disk(sensors.Disk):
     @staticmethod
-    def disk_usage_percent() -> float:
-        return psutil.disk_usage("/").percent
-
-    @staticmethod
-    def disk_used() -> int:  # In bytes
-        return psutil.disk_usage("/").used
-
-    @staticmethod
-    def disk_free() -> int:  # In bytes
-        return psutil.disk_usage("/").free
+    def stats() -> sensors.DiskStats:
+        disk_usage = psutil.disk_usage("/")
+        return sensors.DiskStats(usage_percent=disk_usage.percent, used=disk_usage.used, free=disk_usage.free)
 
 
 class Net(sensors.Net):
@@ -305,17 +241,17 @@ class Net(sensors.Net):
         if if_name != "":
             net_if = get_net_interface_and_update(if_name)
             if net_if is not None:
-                for sensor in net_if.Sensors:
-                    if sensor.SensorType == Hardware.SensorType.Data and str(sensor.Name).startswith("Data Uploaded"):
-                        uploaded = int(sensor.Value * 1000000000.0)
-                    elif sensor.SensorType == Hardware.SensorType.Data and str(sensor.Name).startswith(
-                            "Data Downloaded"):
-                        downloaded = int(sensor.Value * 1000000000.0)
-                    elif sensor.SensorType == Hardware.SensorType.Throughput and str(sensor.Name).startswith(
-                            "Upload Speed"):
-                        upload_rate = int(sensor.Value)
-                    elif sensor.SensorType == Hardware.SensorType.Throughput and str(sensor.Name).startswith(
-                            "Download Speed"):
-                        download_rate = int(sensor.Value)
+                sensor = net_if.sensor(Hardware.SensorType.Data, "Data Uploaded")
+                if sensor is not None:
+                    uploaded = int(sensor.Value * 1000000000.0)
+                sensor = net_if.sensor(Hardware.SensorType.Data, "Data Downloaded")
+                if sensor is not None:
+                    downloaded = int(sensor.Value * 1000000000.0)
+                sensor = net_if.sensor(Hardware.SensorType.Throughput, "Upload Speed")
+                if sensor is not None:
+                    upload_rate = int(sensor.Value)
+                sensor = net_if.sensor(Hardware.SensorType.Throughput, "Download Speed")
+                if sensor is not None:
+                    download_rate = int(sensor.Value)
 
         return upload_rate, uploaded, download_rate, downloaded
@@ -0,0 +1,187 @@
+# turing-smart-screen-python - a Python system monitor and library for 3.5" USB-C displays like Turing Smart Screen or XuanFang
+# https://github.com/mathoudebine/turing-smart-screen-python/
+
+# Copyright (C) 2021-2023  Matthieu Houdebine (mathoudebine)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# This file reads Nvidia GPU stats from a single long-lived nvidia-smi process, instead of starting a new nvidia-smi
+# process for each read like GPUtil does
+# nvidia-smi is started in loop mode: it prints the stats of all GPUs periodically, and a background thread parses its
+# output and keeps the latest stats of each GPU. Reading stats never waits for nvidia-smi
+
+import atexit
+import math
+import os
+import platform
+import shutil
+import subprocess
+import threading
+import time
+from typing import List, NamedTuple, Optional
+
+from library.log import logger
+
+QUERY_FIELDS = ["index", "utilization.gpu", "memory.total", "memory.used", "temperature.gpu"]
+
+# Delay before starting nvidia-smi again if it stopped
+RESTART_DELAY = 10
+
+
+class NvidiaGpuStats(NamedTuple):
+    index: int
+    load: float  # %
+    memory_total: float  # Mb
+    memory_used: float  # Mb
+    temperature: float  # °C
+
+
+def default_command() -> str:
+    nvidia_smi = shutil.which("nvidia-smi")
+    if nvidia_smi is None and platform.system() == "Windows":
+        # Default installation path, if not in PATH
+        nvidia_smi = "%s\\Program Files\\NVIDIA Corporation\\NVSMI\\nvidia-smi.exe" % os.environ.get("systemdrive", "C:")
+    return nvidia_smi or "nvidia-smi"
+
+
+def _to_float(value: str) -> float:
+    # Unavailable values are reported as [N/A], [Not Supported]...
+    try:
+        return float(value)
+    except ValueError:
+        return math.nan
+
+
+def parse_line(line: str) -> Optional[NvidiaGpuStats]:
+    # Parse a line of nvidia-smi output for QUERY_FIELDS in CSV format without header nor units:
+    #   0, 35, 8192, 1024, 45
+    values = [value.strip() for value in line.split(",")]
+    if len(values) != len(QUERY_FIELDS):
+        return None
+    try:
+        index = int(values[0])
+    except ValueError:
+        return None
+    return NvidiaGpuStats(index, *[_to_float(value) for value in values[1:]])
+
+
+class NvidiaSmiSampler:
+    def __init__(self, period: float = 1.0, command: str = None):
+        # Period (s) between samples printed by nvidia-smi
+        self.period = period
+        self.command = command if command else default_command()
+
+        self.mutex = threading.Lock()
+        self.process = None
+        self.start_time = None
+        self.gpus = {}  # GPU index -> latest NvidiaGpuStats
+        self.has_stats = threading.Event()
+
+        atexit.register(self.stop)
+
+    def start(self):
+        # Start nvidia-smi and the thread reading its output, if not running. Raise OSError if it cannot be started
+        with self.mutex:
+            if self.process is not None:
+                return
+            self.start_time = time.monotonic()
+            creationflags = subprocess.CREATE_NO_WINDOW if platform.system() == "Windows" else 0
+            self.process = subprocess.Popen(
+                [self.command, "--query-gpu=" + ",".join(QUERY_FIELDS), "--format=csv,noheader,nounits",
+                 "-lms", str(max(int(self.period * 1000), 1))],
+                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, stdin=subprocess.DEVNULL,
+                universal_newlines=True, bufsize=1, creationflags=creationflags)
+            threading.Thread(target=self._read_output, args=(self.process,), name="Nvidia_Smi_Reader",
+                             daemon=True).start()
+
+    def try_start(self) -> bool:
+        # Start nvidia-smi if not running (see start()). Return False if it cannot be started
+        try:
+            self.start()
+        except FileNotFoundError:
+            # nvidia-smi is not installed: most likely no Nvidia GPU on this computer, this is not an error
+            logger.debug("nvidia-smi not found: %s" % self.command)
+            return False
+        except OSError as e:
+            logger.warning("Cannot start nvidia-smi: %s" % str(e))
+            return False
+        return True
+
+    def _read_output(self, process: subprocess.Popen):
+        for line in process.stdout:
+            gpu_stats = parse_line(line)
+            if gpu_stats is not None:
+                with self.mutex:
+                    self.gpus[gpu_stats.index] = gpu_stats
+                self.has_stats.set()
+
+        # nvidia-smi stopped (or has been stopped): stats will be unavailable until it is started again
+        process.wait()
+        with self.mutex:
+            if self.process is process:
+                logger.warning("nvidia-smi stopped with code %s" % process.returncode)
+                self.process = None
+                self.gpus = {}
+                self.has_stats.clear()
+
+    def set_period(self, period: float):
+        # Change the period between samples. nvidia-smi is started again if it is running with another period
+        with self.mutex:
+            if period == self.period:
+                return
+            self.period = period
+            running = self.process is not None
+        if running:
+            self.stop()
+            self.try_start()
+
+    def is_running(self) -> bool:
+        with self.mutex:
+            return self.process is not None
+
+    def wait_stats(self, timeout: float) -> bool:
+        # Start nvidia-smi if needed and wait until it printed stats. Return False if there are no stats after timeout,
+        # or as soon as nvidia-smi stopped without printing stats
+        if not self.try_start():
+            return False
+
+        end = time.monotonic() + timeout
+        while not self.has_stats.wait(min(max(end - time.monotonic(), 0), 0.05)):
+            if time.monotonic() >= end or not self.is_running():
+                return False
+        return True
+
+    def stats(self) -> List[NvidiaGpuStats]:
+        # Latest stats of all GPUs, empty if nvidia-smi did not print any stats yet
+        with self.mutex:
+            restart = self.process is None and (
+                    self.start_time is None or time.monotonic() - self.start_time > RESTART_DELAY)
+        if restart:
+            self.try_start()
+
+        with self.mutex:
+            return [self.gpus[index] for index in sorted(self.gpus)]
+
+    def stop(self):
+        with self.mutex:
+            process = self.process
+            self.process = None
+            self.gpus = {}
+            self.has_stats.clear()
+        if process is not None:
+            process.terminate()
+            try:
+                process.wait(timeout=1)
+            except subprocess.TimeoutExpired:
+                process.kill()
@@ -16,22 +16,24 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
-# This file will use Python libraries (psutil, GPUtil, etc.) to get hardware sensors
+# This file will use Python libraries (psutil, pyamdgpuinfo, etc.) and nvidia-smi to get hardware sensors
 # For all platforms (Linux, Windows, macOS) but not all HW is supported
 
 import math
-from typing import Tuple
+import platform
+import threading
+import time
+from typing import Dict, List, Sequence, Tuple
 from enum import IntEnum, auto
 
 import library.sensors.sensors as sensors
 from library.log import logger
+from library.sensors.sensors_hwmon import HwmonReader
+from library.sensors.sensors_nvidia import NvidiaSmiSampler
 
 # CPU & disk sensors
 import psutil
 
-# Nvidia GPU
-import GPUtil
-
 # AMD GPU on Linux
 try:
     import pyamdgpuinfo
@@ -44,7 +46,22 @@ try:
 except:
     pyadl = None
 
-PNIC_BEFORE = {}
+# CPU temperature read directly from sysfs on Linux
+if platform.system() == "Linux":
+    HWMON = HwmonReader()
+else:
+    HWMON = None
+
+# Nvidia GPU stats read from a single nvidia-smi process, started on first read
+NVIDIA_SMI = NvidiaSmiSampler()
+
+# Max. time (s) to wait for the first Nvidia GPU stats when detecting GPUs, so that a slow nvidia-smi does not delay
+# startup: if nvidia-smi is still running without stats after this time, Nvidia GPUs are considered available
+NVIDIA_DETECTION_TIMEOUT = 1
+
+# Rates computed over a shorter period than this (e.g. the same interface displayed twice at the same time) would not
+# be accurate: previous rates are returned instead
+NET_MIN_RATE_PERIOD = 0.1
 
 
 class GpuType(IntEnum):
@@ -56,10 +73,67 @@ class GpuType(IntEnum):
 DETECTED_GPU = GpuType.UNSUPPORTED
 
 
+def _cpu_busy_and_total_times(cpu_times) -> Tuple[float, float]:
+    # Same computation as psutil: guest times are already included in user times on Linux, iowait is idle time
+    total = sum(cpu_times) - getattr(cpu_times, "guest", 0) - getattr(cpu_times, "guest_nice", 0)
+    busy = total - cpu_times.idle - getattr(cpu_times, "iowait", 0)
+    return busy, total
+
+
+class CpuSampler:
+    # Compute CPU utilisation from the difference between CPU times of successive samples, instead of waiting for an
+    # interval like psutil.cpu_percent(interval) does: a sample returns immediately the utilisation since the previous
+    # one. Overall and per-core utilisations are computed from the same per-core CPU times
+    def __init__(self):
+        self.mutex = threading.Lock()
+        self.previous_times = [_cpu_busy_and_total_times(cpu_times) for cpu_times in psutil.cpu_times(percpu=True)]
+        self.percent = 0.0
+        self.per_core_percent = [0.0] * len(self.previous_times)
+
+    def sample(self) -> Tuple[float, List[float]]:
+        # Return overall and per-core utilisation (%) since the previous sample
+        with self.mutex:
+            times = [_cpu_busy_and_total_times(cpu_times) for cpu_times in psutil.cpu_times(percpu=True)]
+            if len(times) != len(self.previous_times):
+                # A CPU has been plugged / unplugged: restart from this sample
+                self.previous_times = times
+                return self.percent, self.per_core_percent
+
+            busy_deltas = [max(busy - previous_busy, 0) for ((busy, _), (previous_busy, _)) in
+                           zip(times, self.previous_times)]
+            total_deltas = [max(total - previous_total, 0) for ((_, total), (_, previous_total)) in
+                            zip(times, self.previous_times)]
+
+            # Keep previous values if CPU times did not change yet (samples too close)
+            if sum(total_deltas):
+                self.percent = min(sum(busy_deltas) / sum(total_deltas) * 100, 100.0)
+                self.per_core_percent = [min(busy / total * 100, 100.0) if total else previous_percent
+                                         for (busy, total, previous_percent) in
+                                         zip(busy_deltas, total_deltas, self.per_core_percent)]
+                self.previous_times = times
+
+            return self.percent, self.per_core_percent
+
+    def last_sample(self) -> Tuple[float, List[float]]:
+        # Return overall and per-core utilisation (%) computed by the last sample, without sampling again: sampling
+        # again right after would measure utilisation over a very short window
+        with self.mutex:
+            return self.percent, self.per_core_percent
+
+
+CPU_SAMPLER = CpuSampler()
+
+
 class Cpu(sensors.Cpu):
     @staticmethod
     def percentage(interval: float) -> float:
-        return psutil.cpu_percent(interval=interval)
+        # Utilisation since the previous call, which is made every interval by the scheduler: never wait for interval
+        return CPU_SAMPLER.sample()[0]
+
+    @staticmethod
+    def percentage_per_core() -> List[float]:
+        # Per-core utilisation comes from the same sample as the last percentage() call, made every interval
+        return CPU_SAMPLER.last_sample()[1]
 
     @staticmethod
     def frequency() -> float:
@@ -71,6 +145,8 @@ class Cpu(sensors.Cpu):
 
     @staticmethod
     def is_temperature_available() -> bool:
+        if HWMON is not None and HWMON.cpu_input is not None:
+            return True
         try:
             sensors_temps = psutil.sensors_temperatures()
             if 'coretemp' in sensors_temps or 'k10temp' in sensors_temps or 'cpu_thermal' in sensors_temps:
@@ -83,6 +159,13 @@ class Cpu(sensors.Cpu):
 
     @staticmethod
     def temperature() -> float:
+        if HWMON is not None and HWMON.cpu_input is not None:
+            try:
+                return HWMON.cpu_temperature()
+            except (OSError, ValueError):
+                # Sensor cannot be read for now: try with psutil
+                pass
+
         cpu_temp = 0
         sensors_temps = psutil.sensors_temperatures()
         if 'coretemp' in sensors_temps:
@@ -108,6 +191,15 @@ class Gpu(sensors.Gpu):
         else:
             return math.nan, math.nan, math.nan, math.nan
 
+    @staticmethod
+    def devices_stats() -> List[sensors.GpuDeviceStats]:
+        if DETECTED_GPU == GpuType.AMD:
+            return GpuAmd.devices_stats()
+        elif DETECTED_GPU == GpuType.NVIDIA:
+            return GpuNvidia.devices_stats()
+        else:
+            return []
+
     @staticmethod
     def is_available() -> bool:
         global DETECTED_GPU
@@ -123,176 +215,162 @@ class Gpu(sensors.Gpu):
 
         return DETECTED_GPU != GpuType.UNSUPPORTED
 
+    @staticmethod
+    def set_interval(interval: float):
+        # nvidia-smi prints Nvidia GPU stats at the refresh interval of the theme
+        NVIDIA_SMI.set_period(interval)
+
 
 class GpuNvidia(sensors.Gpu):
     @staticmethod
     def stats() -> Tuple[float, float, float, float]:  # load (%) / used mem (%) / used mem (Mb) / temp (°C)
-        # Unlike other sensors, Nvidia GPU with GPUtil pulls in all the stats at once
-        nvidia_gpus = GPUtil.getGPUs()
-
-        try:
-            memory_used_all = [item.memoryUsed for item in nvidia_gpus]
-            memory_used_mb = sum(memory_used_all) / len(memory_used_all)
-        except:
-            memory_used_mb = math.nan
-
-        try:
-            memory_total_all = [item.memoryTotal for item in nvidia_gpus]
-            memory_total_mb = sum(memory_total_all) / len(memory_total_all)
-            memory_percentage = (memory_used_mb / memory_total_mb) * 100
-        except:
-            memory_percentage = math.nan
-
-        try:
-            load_all = [item.load for item in nvidia_gpus]
-            load = (sum(load_all) / len(load_all)) * 100
-        except:
-            load = math.nan
-
-        try:
-            temperature_all = [item.temperature for item in nvidia_gpus]
-            temperature = sum(temperature_all) / len(temperature_all)
-        except:
-            temperature = math.nan
-
-        return load, memory_percentage, memory_used_mb, temperature
+        return sensors.average_gpu_stats(GpuNvidia.devices_stats())
 
     @staticmethod
-    def is_available() -> bool:
-        try:
-            return len(GPUtil.getGPUs()) > 0
-        except:
-            return False
+    def devices_stats() -> List[sensors.GpuDeviceStats]:
+        # Unlike other sensors, Nvidia GPU with nvidia-smi pulls in all the stats at once
+        return [sensors.GpuDeviceStats(load=gpu.load, memory_used_mb=gpu.memory_used,
+                                       memory_total_mb=gpu.memory_total, temperature=gpu.temperature)
+                for gpu in NVIDIA_SMI.stats()]
 
-
-class GpuAmd(sensors.Gpu):
     @staticmethod
-    def stats() -> Tuple[float, float, float, float]:  # load (%) / used mem (%) / used mem (Mb) / temp (°C)
-        if pyamdgpuinfo:
-            # Unlike other sensors, AMD GPU with pyamdgpuinfo pulls in all the stats at once
-            i = 0
-            amd_gpus = []
-            while i < pyamdgpuinfo.detect_gpus():
-                amd_gpus.append(pyamdgpuinfo.get_gpu(i))
-                i = i + 1
-
-            try:
-                memory_used_all = [item.query_vram_usage() for item in amd_gpus]
-                memory_used_bytes = sum(memory_used_all) / len(memory_used_all)
-                memory_used = memory_used_bytes / 1000000
-            except:
-                memory_used_bytes = math.nan
-                memory_used = math.nan
+    def is_available() -> bool:
+        # Start reading stats now, so that they are available for the first refresh. If there is no Nvidia GPU,
+        # nvidia-smi is not installed or stops without printing stats
+        return NVIDIA_SMI.wait_stats(timeout=NVIDIA_DETECTION_TIMEOUT) or NVIDIA_SMI.is_running()
 
-            try:
-                memory_total_all = [item.memory_info["vram_size"] for item in amd_gpus]
-                memory_total_bytes = sum(memory_total_all) / len(memory_total_all)
-                memory_percentage = (memory_used_bytes / memory_total_bytes) * 100
-            except:
-                memory_percentage = math.nan
 
-            try:
-                load_all = [item.query_load() for item in amd_gpus]
-                load = (sum(load_all) / len(load_all)) * 100
-            except:
-                load = math.nan
+def _query_gpu(query, scale: float = 1.0) -> float:
+    # Value returned by a GPU query, NaN if it is not supported
+    try:
+        return query() * scale
+    except:
+        return math.nan
 
-            try:
-                temperature_all = [item.query_temperature() for item in amd_gpus]
-                temperature = sum(temperature_all) / len(temperature_all)
-            except:
-                temperature = math.nan
 
-            return load, memory_percentage, memory_used, temperature
-        elif pyadl:
-            amd_gpus = pyadl.ADLManager.getInstance().getDevices()
+class GpuAmd(sensors.Gpu):
+    # GPU handles, detected on first use
+    devices = None
 
-            try:
-                load_all = [item.getCurrentUsage() for item in amd_gpus]
-                load = (sum(load_all) / len(load_all))
-            except:
-                load = math.nan
+    @staticmethod
+    def get_devices() -> list:
+        if GpuAmd.devices is None:
+            if pyamdgpuinfo:
+                GpuAmd.devices = [pyamdgpuinfo.get_gpu(i) for i in range(pyamdgpuinfo.detect_gpus())]
+            elif pyadl:
+                GpuAmd.devices = pyadl.ADLManager.getInstance().getDevices()
+            else:
+                GpuAmd.devices = []
+        return GpuAmd.devices
 
-            try:
-                temperature_all = [item.getCurrentTemperature() for item in amd_gpus]
-                temperature = sum(temperature_all) / len(temperature_all)
-            except:
-                temperature = math.nan
+    @staticmethod
+    def stats() -> Tuple[float, float, float, float]:  # load (%) / used mem (%) / used mem (Mb) / temp (°C)
+        return sensors.average_gpu_stats(GpuAmd.devices_stats())
 
-            # Memory absolute (M) and relative (%) usage not supported by pyadl
-            return load, math.nan, math.nan, temperature
+    @staticmethod
+    def devices_stats() -> List[sensors.GpuDeviceStats]:
+        devices_stats = []
+        for device in GpuAmd.get_devices():
+            if pyamdgpuinfo:
+                devices_stats.append(sensors.GpuDeviceStats(
+                    load=_query_gpu(device.query_load, 100),
+                    memory_used_mb=_query_gpu(device.query_vram_usage, 1 / 1000000),
+                    memory_total_mb=_query_gpu(lambda: device.memory_info["vram_size"], 1 / 1000000),
+                    temperature=_query_gpu(device.query_temperature)))
+            else:
+                # Memory absolute (M) and relative (%) usage not supported by pyadl
+                devices_stats.append(sensors.GpuDeviceStats(
+                    load=_query_gpu(device.getCurrentUsage),
+                    memory_used_mb=math.nan,
+                    memory_total_mb=math.nan,
+                    temperature=_query_gpu(device.getCurrentTemperature)))
+        return devices_stats
 
     @staticmethod
     def is_available() -> bool:
         try:
-            if pyamdgpuinfo and pyamdgpuinfo.detect_gpus() > 0:
-                return True
-            elif pyadl and len(pyadl.ADLManager.getInstance().getDevices()) > 0:
-                return True
-            else:
-                return False
+            return len(GpuAmd.get_devices()) > 0
         except:
             return False
 
 
 class Memory(sensors.Memory):
     @staticmethod
-    def swap_percent() -> float:
-        return psutil.swap_memory().percent
+    def stats(swap: bool = True, virtual: bool = True) -> sensors.MemoryStats:
+        swap_percent = psutil.swap_memory().percent if swap else math.nan
+        if not virtual:
+            return sensors.MemoryStats(swap_percent=swap_percent, virtual_percent=math.nan, virtual_used=0,
+                                       virtual_free=0)
 
-    @staticmethod
-    def virtual_percent() -> float:
-        return psutil.virtual_memory().percent
+        virtual_memory = psutil.virtual_memory()
+        return sensors.MemoryStats(swap_percent=swap_percent,
+                                   virtual_percent=virtual_memory.percent,
+                                   virtual_used=virtual_memory.used,
+                                   virtual_free=virtual_memory.free)
 
-    @staticmethod
-    def virtual_used() -> int:  # In bytes
-        return psutil.virtual_memory().used
 
+class Disk(sensors.Disk):
     @staticmethod
-    def virtual_free() -> int:  # In bytes
-        return psutil.virtual_memory().free
+    def stats() -> sensors.DiskStats:
+        disk_usage = psutil.disk_usage("/")
+        return sensors.DiskStats(usage_percent=disk_usage.percent, used=disk_usage.used, free=disk_usage.free)
+
+
+class NetSampler:
+    # Compute network rates from the difference between the counters of successive samples, divided by the actual time
+    # elapsed between the samples. Counters of all interfaces are read at once, and each interface keeps its own
+    # previous sample so that interfaces can be sampled at different times
+    def __init__(self):
+        self.mutex = threading.Lock()
+        self.previous_counters = {}  # Interface name -> (monotonic timestamp, counters)
+        self.previous_stats = {}  # Interface name -> last stats
+
+    def sample(self, if_names: Sequence[str]) -> Dict[str, sensors.NetStats]:
+        with self.mutex:
+            timestamp = time.monotonic()
+            pnic = psutil.net_io_counters(pernic=True)
+
+            interfaces_stats = {}
+            for if_name in if_names:
+                if if_name == "":
+                    interfaces_stats[if_name] = sensors.NetStats(0, 0, 0, 0)
+                elif if_name not in pnic:
+                    logger.warning("Network interface '%s' not found. Check names in config.yaml." % if_name)
+                    interfaces_stats[if_name] = sensors.NetStats(0, 0, 0, 0)
+                else:
+                    interfaces_stats[if_name] = self._interface_stats(if_name, timestamp, pnic[if_name])
+            return interfaces_stats
+
+    def _interface_stats(self, if_name: str, timestamp: float, counters) -> sensors.NetStats:
+        upload_rate = 0
+        download_rate = 0
 
+        if if_name in self.previous_counters:
+            (previous_timestamp, previous_counters) = self.previous_counters[if_name]
+            elapsed = timestamp - previous_timestamp
+            if elapsed < NET_MIN_RATE_PERIOD:
+                return self.previous_stats[if_name]._replace(uploaded=counters.bytes_sent,
+                                                             downloaded=counters.bytes_recv)
+            # Counters may be reset (e.g. interface restarted)
+            upload_rate = max(counters.bytes_sent - previous_counters.bytes_sent, 0) / elapsed
+            download_rate = max(counters.bytes_recv - previous_counters.bytes_recv, 0) / elapsed
 
-class Disk(sensors.Disk):
-    @staticmethod
-    def disk_usage_percent() -> float:
-        return psutil.disk_usage("/").percent
+        self.previous_counters[if_name] = (timestamp, counters)
+        self.previous_stats[if_name] = sensors.NetStats(upload_rate, counters.bytes_sent, download_rate,
+                                                        counters.bytes_recv)
+        return self.previous_stats[if_name]
 
-    @staticmethod
-    def disk_used() -> int:  # In bytes
-        return psutil.disk_usage("/").used
 
-    @staticmethod
-    def disk_free() -> int:  # In bytes
-        return psutil.disk_usage("/").free
+NET_SAMPLER = NetSampler()
 
 
 class Net(sensors.Net):
     @staticmethod
     def stats(if_name, interval) -> Tuple[
         int, int, int, int]:  # up rate (B/s), uploaded (B), dl rate (B/s), downloaded (B)
-        global PNIC_BEFORE
-        # Get current counters
-        pnic_after = psutil.net_io_counters(pernic=True)
+        # Rates are computed over the actual time elapsed since the previous sample of this interface, not interval
+        return tuple(NET_SAMPLER.sample([if_name])[if_name])
 
-        upload_rate = 0
-        uploaded = 0
-        download_rate = 0
-        downloaded = 0
-
-        if if_name != "":
-            if if_name in pnic_after:
-                try:
-                    upload_rate = (pnic_after[if_name].bytes_sent - PNIC_BEFORE[if_name].bytes_sent) / interval
-                    uploaded = pnic_after[if_name].bytes_sent
-                    download_rate = (pnic_after[if_name].bytes_recv - PNIC_BEFORE[if_name].bytes_recv) / interval
-                    downloaded = pnic_after[if_name].bytes_recv
-                except:
-                    # Interface might not be in PNIC_BEFORE for now
-                    pass
-
-                PNIC_BEFORE.update({if_name: pnic_after[if_name]})
-            else:
-                logger.warning("Network interface '%s' not found. Check names in config.yaml." % if_name)
-
-        return upload_rate, uploaded, download_rate, downloaded
+    @staticmethod
+    def interfaces_stats(if_names: Sequence[str]) -> Dict[str, sensors.NetStats]:
+        return NET_SAMPLER.sample(if_names)
@@ -59,34 +59,19 @@ class Gpu(sensors.Gpu):
 
 class Memory(sensors.Memory):
     @staticmethod
-    def swap_percent() -> float:
-        return random.uniform(0, 100)
-
-    @staticmethod
-    def virtual_percent() -> float:
-        return random.uniform(0, 100)
-
-    @staticmethod
-    def virtual_used() -> int:  # In bytes
-        return random.randint(300000000, 16000000000)
-
-    @staticmethod
-    def virtual_free() -> int:  # In bytes
-        return random.randint(300000000, 16000000000)
+    def stats(swap: bool = True, virtual: bool = True) -> sensors.MemoryStats:
+        return sensors.MemoryStats(swap_percent=random.uniform(0, 100),
+                                   virtual_percent=random.uniform(0, 100),
+                                   virtual_used=random.randint(300000000, 16000000000),
+                                   virtual_free=random.randint(300000000, 16000000000))
 
 
 class Disk(sensors.Disk):
     @staticmethod
-    def disk_usage_percent() -> float:
-        return random.uniform(0, 100)
-
-    @staticmethod
-    def disk_used() -> int:  # In bytes
-        return random.randint(1000000000, 2000000000000)
-
-    @staticmethod
-    def disk_free() -> int:  # In bytes
-        return random.randint(1000000000, 2000000000000)
+    def stats() -> sensors.DiskStats:
+        return sensors.DiskStats(usage_percent=random.uniform(0, 100),
+                                 used=random.randint(1000000000, 2000000000000),
+                                 free=random.randint(1000000000, 2000000000000))
 
 
 class Net(sensors.Net):
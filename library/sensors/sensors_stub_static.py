@@ -70,34 +70,21 @@ class Gpu(sensors.Gpu):
 
 class Memory(sensors.Memory):
     @staticmethod
-    def swap_percent() -> float:
-        return PERCENTAGE_SENSOR_VALUE
-
-    @staticmethod
-    def virtual_percent() -> float:
-        return PERCENTAGE_SENSOR_VALUE
-
-    @staticmethod
-    def virtual_used() -> int:  # In bytes
-        return int(MEMORY_TOTAL_SIZE_GB / 100 * PERCENTAGE_SENSOR_VALUE) * 1000000000
-
-    @staticmethod
-    def virtual_free() -> int:  # In bytes
-        return int(MEMORY_TOTAL_SIZE_GB / 100 * (100 - PERCENTAGE_SENSOR_VALUE)) * 1000000000
+    def stats(swap: bool = True, virtual: bool = True) -> sensors.MemoryStats:
+        return sensors.MemoryStats(
+            swap_percent=PERCENTAGE_SENSOR_VALUE,
+            virtual_percent=PERCENTAGE_SENSOR_VALUE,
+            virtual_used=int(MEMORY_TOTAL_SIZE_GB / 100 * PERCENTAGE_SENSOR_VALUE) * 1000000000,
+            virtual_free=int(MEMORY_TOTAL_SIZE_GB / 100 * (100 - PERCENTAGE_SENSOR_VALUE)) * 1000000000)
 
 
 class Disk(sensors.Disk):
     @staticmethod
-    def disk_usage_percent() -> float:
-        return PERCENTAGE_SENSOR_VALUE
-
-    @staticmethod
-    def disk_used() -> int:  # In bytes
-        return int(DISK_TOTAL_SIZE_GB / 100 * PERCENTAGE_SENSOR_VALUE) * 1000000000
-
-    @staticmethod
-    def disk_free() -> int:  # In bytes
-        return int(DISK_TOTAL_SIZE_GB / 100 * (100 - PERCENTAGE_SENSOR_VALUE)) * 1000000000
+    def stats() -> sensors.DiskStats:
+        return sensors.DiskStats(
+            usage_percent=PERCENTAGE_SENSOR_VALUE,
+            used=int(DISK_TOTAL_SIZE_GB / 100 * PERCENTAGE_SENSOR_VALUE) * 1000000000,
+            free=int(DISK_TOTAL_SIZE_GB / 100 * (100 - PERCENTAGE_SENSOR_VALUE)) * 1000000000)
 
 
 class Net(sensors.Net):
@@ -31,8 +31,10 @@ import babel.dates
 from psutil._common import bytes2human
 
 import library.config as config
+import library.sensors.sensors_cache as sensors_cache
 from library.display import display
 from library.log import logger
+from library.sensors.sensors import average_gpu_stats
 
 ETH_CARD = config.CONFIG_DATA["config"]["ETH"]
 WLO_CARD = config.CONFIG_DATA["config"]["WLO"]
@@ -67,6 +69,8 @@ else:
     except:
         os._exit(0)
 
+sensors = sensors_cache.CachedSensors(sensors, sensors_cache.cache)
+
 
 def get_full_path(path, name):
     if name:
@@ -75,11 +79,26 @@ def get_full_path(path, name):
         return None
 
 
+def value_font_color(text_theme_data, stale: bool):
+    # Values from a previous read, given because the sensor did not answer in time (see sensors_cache), are dimmed:
+    # their font color is mixed with the background color so that a frozen value is not taken for an up-to-date one
+    font_color = text_theme_data.get("FONT_COLOR", (0, 0, 0))
+    if not stale:
+        return font_color
+    background_color = text_theme_data.get("BACKGROUND_COLOR", (255, 255, 255))
+    if isinstance(font_color, str):
+        font_color = tuple(map(int, font_color.split(', ')))
+    if isinstance(background_color, str):
+        background_color = tuple(map(int, background_color.split(', ')))
+    return tuple((font + background) // 2 for (font, background) in zip(font_color, background_color))
+
+
 class CPU:
     @staticmethod
     def percentage():
-        cpu_percentage = sensors.Cpu.percentage(
-            interval=config.THEME_DATA['STATS']['CPU']['PERCENTAGE'].get("INTERVAL", None))
+        interval = config.THEME_DATA['STATS']['CPU']['PERCENTAGE'].get("INTERVAL", None)
+        cpu_percentage = sensors.Cpu.percentage(interval=interval)
+        stale = sensors_cache.cache.is_stale("Cpu.percentage", interval=interval)
         # logger.debug(f"CPU Percentage: {cpu_percentage}")
 
         if config.THEME_DATA['STATS']['CPU']['PERCENTAGE']['TEXT'].get("SHOW", False):
@@ -95,7 +114,7 @@ class CPU:
                 font=config.THEME_DATA['STATS']['CPU']['PERCENTAGE']['TEXT'].get("FONT",
                                                                                  "roboto-mono/RobotoMono-Regular.ttf"),
                 font_size=config.THEME_DATA['STATS']['CPU']['PERCENTAGE']['TEXT'].get("FONT_SIZE", 10),
-                font_color=config.THEME_DATA['STATS']['CPU']['PERCENTAGE']['TEXT'].get("FONT_COLOR", (0, 0, 0)),
+                font_color=value_font_color(config.THEME_DATA['STATS']['CPU']['PERCENTAGE']['TEXT'], stale),
                 background_color=config.THEME_DATA['STATS']['CPU']['PERCENTAGE']['TEXT'].get("BACKGROUND_COLOR",
                                                                                              (255, 255, 255)),
                 background_image=get_full_path(config.THEME_DATA['PATH'],
@@ -128,6 +147,7 @@ class CPU:
         if config.THEME_DATA['STATS']['CPU']['FREQUENCY']['TEXT'].get("SHOW", False):
 
             cpu_freq = f'{sensors.Cpu.frequency() / 1000:.2f}'
+            stale = sensors_cache.cache.is_stale("Cpu.frequency")
             if config.THEME_DATA['STATS']['CPU']['FREQUENCY']['TEXT'].get("SHOW_UNIT", True):
                 cpu_freq += " GHz"
 
@@ -138,7 +158,7 @@ class CPU:
                 font=config.THEME_DATA['STATS']['CPU']['FREQUENCY']['TEXT'].get("FONT",
                                                                                 "roboto-mono/RobotoMono-Regular.ttf"),
                 font_size=config.THEME_DATA['STATS']['CPU']['FREQUENCY']['TEXT'].get("FONT_SIZE", 10),
-                font_color=config.THEME_DATA['STATS']['CPU']['FREQUENCY']['TEXT'].get("FONT_COLOR", (0, 0, 0)),
+                font_color=value_font_color(config.THEME_DATA['STATS']['CPU']['FREQUENCY']['TEXT'], stale),
                 background_color=config.THEME_DATA['STATS']['CPU']['FREQUENCY']['TEXT'].get("BACKGROUND_COLOR",
                                                                                             (255, 255, 255)),
                 background_image=get_full_path(config.THEME_DATA['PATH'],
@@ -150,6 +170,7 @@ class CPU:
     @staticmethod
     def load():
         cpu_load = sensors.Cpu.load()
+        stale = sensors_cache.cache.is_stale("Cpu.load")
         # logger.debug(f"CPU Load: ({cpu_load[0]},{cpu_load[1]},{cpu_load[2]})")
 
         if config.THEME_DATA['STATS']['CPU']['LOAD']['ONE']['TEXT'].get("SHOW", False):
@@ -165,7 +186,7 @@ class CPU:
                 font=config.THEME_DATA['STATS']['CPU']['LOAD']['ONE']['TEXT'].get("FONT",
                                                                                   "roboto-mono/RobotoMono-Regular.ttf"),
                 font_size=config.THEME_DATA['STATS']['CPU']['LOAD']['ONE']['TEXT'].get("FONT_SIZE", 10),
-                font_color=config.THEME_DATA['STATS']['CPU']['LOAD']['ONE']['TEXT'].get("FONT_COLOR", (0, 0, 0)),
+                font_color=value_font_color(config.THEME_DATA['STATS']['CPU']['LOAD']['ONE']['TEXT'], stale),
                 background_color=config.THEME_DATA['STATS']['CPU']['LOAD']['ONE']['TEXT'].get("BACKGROUND_COLOR",
                                                                                               (255, 255, 255)),
                 background_image=get_full_path(config.THEME_DATA['PATH'],
@@ -187,7 +208,7 @@ class CPU:
                 font=config.THEME_DATA['STATS']['CPU']['LOAD']['FIVE']['TEXT'].get("FONT",
                                                                                    "roboto-mono/RobotoMono-Regular.ttf"),
                 font_size=config.THEME_DATA['STATS']['CPU']['LOAD']['FIVE']['TEXT'].get("FONT_SIZE", 10),
-                font_color=config.THEME_DATA['STATS']['CPU']['LOAD']['FIVE']['TEXT'].get("FONT_COLOR", (0, 0, 0)),
+                font_color=value_font_color(config.THEME_DATA['STATS']['CPU']['LOAD']['FIVE']['TEXT'], stale),
                 background_color=config.THEME_DATA['STATS']['CPU']['LOAD']['FIVE']['TEXT'].get("BACKGROUND_COLOR",
                                                                                                (255, 255, 255)),
                 background_image=get_full_path(config.THEME_DATA['PATH'],
@@ -208,7 +229,7 @@ class CPU:
                 font=config.THEME_DATA['STATS']['CPU']['LOAD']['FIFTEEN']['TEXT'].get("FONT",
                                                                                       "roboto-mono/RobotoMono-Regular.ttf"),
                 font_size=config.THEME_DATA['STATS']['CPU']['LOAD']['FIFTEEN']['TEXT'].get("FONT_SIZE", 10),
-                font_color=config.THEME_DATA['STATS']['CPU']['LOAD']['FIFTEEN']['TEXT'].get("FONT_COLOR", (0, 0, 0)),
+                font_color=value_font_color(config.THEME_DATA['STATS']['CPU']['LOAD']['FIFTEEN']['TEXT'], stale),
                 background_color=config.THEME_DATA['STATS']['CPU']['LOAD']['FIFTEEN']['TEXT'].get("BACKGROUND_COLOR",
                                                                                                   (255, 255, 255)),
                 background_image=get_full_path(config.THEME_DATA['PATH'],
@@ -225,6 +246,7 @@ class CPU:
         if config.THEME_DATA['STATS']['CPU']['TEMPERATURE']['TEXT'].get("SHOW", False):
 
             cpu_temp = f"{int(sensors.Cpu.temperature()):>3}"
+            stale = sensors_cache.cache.is_stale("Cpu.temperature")
             if config.THEME_DATA['STATS']['CPU']['TEMPERATURE']['TEXT'].get("SHOW_UNIT", True):
                 cpu_temp += "°C"
 
@@ -235,7 +257,7 @@ class CPU:
                 font=config.THEME_DATA['STATS']['CPU']['TEMPERATURE']['TEXT'].get("FONT",
                                                                                   "roboto-mono/RobotoMono-Regular.ttf"),
                 font_size=config.THEME_DATA['STATS']['CPU']['TEMPERATURE']['TEXT'].get("FONT_SIZE", 10),
-                font_color=config.THEME_DATA['STATS']['CPU']['TEMPERATURE']['TEXT'].get("FONT_COLOR", (0, 0, 0)),
+                font_color=value_font_color(config.THEME_DATA['STATS']['CPU']['TEMPERATURE']['TEXT'], stale),
                 background_color=config.THEME_DATA['STATS']['CPU']['TEMPERATURE']['TEXT'].get("BACKGROUND_COLOR",
                                                                                               (255, 255, 255)),
                 background_image=get_full_path(config.THEME_DATA['PATH'],
@@ -245,7 +267,7 @@ class CPU:
             )
 
 
-def display_gpu_stats(load, memory_percentage, memory_used_mb, temperature):
+def display_gpu_stats(load, memory_percentage, memory_used_mb, temperature, stale=False):
     if config.THEME_DATA['STATS']['GPU']['PERCENTAGE']['GRAPH'].get("SHOW", False):
         if math.isnan(load):
             logger.warning("Your GPU load is not supported yet")
@@ -288,7 +310,7 @@ def display_gpu_stats(load, memory_percentage, memory_used_mb, temperature):
                 font=config.THEME_DATA['STATS']['GPU']['PERCENTAGE']['TEXT'].get("FONT",
                                                                                  "roboto-mono/RobotoMono-Regular.ttf"),
                 font_size=config.THEME_DATA['STATS']['GPU']['PERCENTAGE']['TEXT'].get("FONT_SIZE", 10),
-                font_color=config.THEME_DATA['STATS']['GPU']['PERCENTAGE']['TEXT'].get("FONT_COLOR", (0, 0, 0)),
+                font_color=value_font_color(config.THEME_DATA['STATS']['GPU']['PERCENTAGE']['TEXT'], stale),
                 background_color=config.THEME_DATA['STATS']['GPU']['PERCENTAGE']['TEXT'].get("BACKGROUND_COLOR",
                                                                                              (255, 255, 255)),
                 background_image=get_full_path(config.THEME_DATA['PATH'],
@@ -336,7 +358,7 @@ def display_gpu_stats(load, memory_percentage, memory_used_mb, temperature):
                 font=config.THEME_DATA['STATS']['GPU']['MEMORY']['TEXT'].get("FONT",
                                                                              "roboto-mono/RobotoMono-Regular.ttf"),
                 font_size=config.THEME_DATA['STATS']['GPU']['MEMORY']['TEXT'].get("FONT_SIZE", 10),
-                font_color=config.THEME_DATA['STATS']['GPU']['MEMORY']['TEXT'].get("FONT_COLOR", (0, 0, 0)),
+                font_color=value_font_color(config.THEME_DATA['STATS']['GPU']['MEMORY']['TEXT'], stale),
                 background_color=config.THEME_DATA['STATS']['GPU']['MEMORY']['TEXT'].get("BACKGROUND_COLOR",
                                                                                          (255, 255, 255)),
                 background_image=get_full_path(config.THEME_DATA['PATH'],
@@ -361,7 +383,7 @@ def display_gpu_stats(load, memory_percentage, memory_used_mb, temperature):
                 font=config.THEME_DATA['STATS']['GPU']['TEMPERATURE']['TEXT'].get("FONT",
                                                                                   "roboto-mono/RobotoMono-Regular.ttf"),
                 font_size=config.THEME_DATA['STATS']['GPU']['TEMPERATURE']['TEXT'].get("FONT_SIZE", 10),
-                font_color=config.THEME_DATA['STATS']['GPU']['TEMPERATURE']['TEXT'].get("FONT_COLOR", (0, 0, 0)),
+                font_color=value_font_color(config.THEME_DATA['STATS']['GPU']['TEMPERATURE']['TEXT'], stale),
                 background_color=config.THEME_DATA['STATS']['GPU']['TEMPERATURE']['TEXT'].get("BACKGROUND_COLOR",
                                                                                               (255, 255, 255)),
                 background_image=get_full_path(config.THEME_DATA['PATH'],
@@ -372,10 +394,28 @@ def display_gpu_stats(load, memory_percentage, memory_used_mb, temperature):
 
 
 class Gpu:
+    # Set once the GPU with the index set in the theme has been reported as not found
+    missing_gpu_reported = False
+
     @staticmethod
     def stats():
-        load, memory_percentage, memory_used_mb, temperature = sensors.Gpu.stats()
-        display_gpu_stats(load, memory_percentage, memory_used_mb, temperature)
+        gpu_index = config.THEME_DATA['STATS']['GPU'].get("INDEX", None)
+        if gpu_index is None:
+            # Average of all GPUs
+            load, memory_percentage, memory_used_mb, temperature = sensors.Gpu.stats()
+            stale = sensors_cache.cache.is_stale("Gpu.stats")
+        else:
+            devices_stats = sensors.Gpu.devices_stats()
+            stale = sensors_cache.cache.is_stale("Gpu.devices_stats")
+            if gpu_index < len(devices_stats):
+                load, memory_percentage, memory_used_mb, temperature = average_gpu_stats(
+                    [devices_stats[gpu_index]])
+            else:
+                if not Gpu.missing_gpu_reported:
+                    logger.warning("GPU %d not found, check INDEX of GPU stats in your theme" % gpu_index)
+                    Gpu.missing_gpu_reported = True
+                load, memory_percentage, memory_used_mb, temperature = math.nan, math.nan, math.nan, math.nan
+        display_gpu_stats(load, memory_percentage, memory_used_mb, temperature, stale)
 
     @staticmethod
     def is_available():
@@ -385,7 +425,10 @@ class Gpu:
 class Memory:
     @staticmethod
     def stats():
-        swap_percent = sensors.Memory.swap_percent()
+        # Swap and virtual memory are only read if the theme displays them
+        (swap, virtual) = (config.is_shown('MEMORY', 'SWAP'), config.is_shown('MEMORY', 'VIRTUAL'))
+        memory_stats = sensors.Memory.stats(swap=swap, virtual=virtual)
+        stale = sensors_cache.cache.is_stale("Memory.stats", swap=swap, virtual=virtual)
 
         if config.THEME_DATA['STATS']['MEMORY']['SWAP']['GRAPH'].get("SHOW", False):
             display.lcd.DisplayProgressBar(
@@ -393,7 +436,7 @@ class Memory:
                 y=config.THEME_DATA['STATS']['MEMORY']['SWAP']['GRAPH'].get("Y", 0),
                 width=config.THEME_DATA['STATS']['MEMORY']['SWAP']['GRAPH'].get("WIDTH", 0),
                 height=config.THEME_DATA['STATS']['MEMORY']['SWAP']['GRAPH'].get("HEIGHT", 0),
-                value=int(swap_percent),
+                value=int(memory_stats.swap_percent),
                 min_value=config.THEME_DATA['STATS']['MEMORY']['SWAP']['GRAPH'].get("MIN_VALUE", 0),
                 max_value=config.THEME_DATA['STATS']['MEMORY']['SWAP']['GRAPH'].get("MAX_VALUE", 100),
                 bar_color=config.THEME_DATA['STATS']['MEMORY']['SWAP']['GRAPH'].get("BAR_COLOR", (0, 0, 0)),
@@ -406,15 +449,13 @@ class Memory:
                                                    None))
             )
 
-        virtual_percent = sensors.Memory.virtual_percent()
-
         if config.THEME_DATA['STATS']['MEMORY']['VIRTUAL']['GRAPH'].get("SHOW", False):
             display.lcd.DisplayProgressBar(
                 x=config.THEME_DATA['STATS']['MEMORY']['VIRTUAL']['GRAPH'].get("X", 0),
                 y=config.THEME_DATA['STATS']['MEMORY']['VIRTUAL']['GRAPH'].get("Y", 0),
                 width=config.THEME_DATA['STATS']['MEMORY']['VIRTUAL']['GRAPH'].get("WIDTH", 0),
                 height=config.THEME_DATA['STATS']['MEMORY']['VIRTUAL']['GRAPH'].get("HEIGHT", 0),
-                value=int(virtual_percent),
+                value=int(memory_stats.virtual_percent),
                 min_value=config.THEME_DATA['STATS']['MEMORY']['VIRTUAL']['GRAPH'].get("MIN_VALUE", 0),
                 max_value=config.THEME_DATA['STATS']['MEMORY']['VIRTUAL']['GRAPH'].get("MAX_VALUE", 100),
                 bar_color=config.THEME_DATA['STATS']['MEMORY']['VIRTUAL']['GRAPH'].get("BAR_COLOR", (0, 0, 0)),
@@ -428,7 +469,7 @@ class Memory:
             )
 
         if config.THEME_DATA['STATS']['MEMORY']['VIRTUAL']['PERCENT_TEXT'].get("SHOW", False):
-            virtual_percent_text = f"{int(virtual_percent):>3}"
+            virtual_percent_text = f"{int(memory_stats.virtual_percent):>3}"
             if config.THEME_DATA['STATS']['MEMORY']['VIRTUAL']['PERCENT_TEXT'].get("SHOW_UNIT", True):
                 virtual_percent_text += "%"
 
@@ -439,7 +480,7 @@ class Memory:
                 font=config.THEME_DATA['STATS']['MEMORY']['VIRTUAL']['PERCENT_TEXT'].get("FONT",
                                                                                          "roboto-mono/RobotoMono-Regular.ttf"),
                 font_size=config.THEME_DATA['STATS']['MEMORY']['VIRTUAL']['PERCENT_TEXT'].get("FONT_SIZE", 10),
-                font_color=config.THEME_DATA['STATS']['MEMORY']['VIRTUAL']['PERCENT_TEXT'].get("FONT_COLOR", (0, 0, 0)),
+                font_color=value_font_color(config.THEME_DATA['STATS']['MEMORY']['VIRTUAL']['PERCENT_TEXT'], stale),
                 background_color=config.THEME_DATA['STATS']['MEMORY']['VIRTUAL']['PERCENT_TEXT'].get("BACKGROUND_COLOR",
                                                                                                      (255, 255, 255)),
                 background_image=get_full_path(config.THEME_DATA['PATH'],
@@ -448,9 +489,7 @@ class Memory:
             )
 
         if config.THEME_DATA['STATS']['MEMORY']['VIRTUAL']['USED'].get("SHOW", False):
-            virtual_used = sensors.Memory.virtual_used()
-
-            virtual_used_text = f"{int(virtual_used / 1000000):>5}"
+            virtual_used_text = f"{int(memory_stats.virtual_used / 1000000):>5}"
             if config.THEME_DATA['STATS']['MEMORY']['VIRTUAL']['USED'].get("SHOW_UNIT", True):
                 virtual_used_text += " M"
 
@@ -461,7 +500,7 @@ class Memory:
                 font=config.THEME_DATA['STATS']['MEMORY']['VIRTUAL']['USED'].get("FONT",
                                                                                  "roboto-mono/RobotoMono-Regular.ttf"),
                 font_size=config.THEME_DATA['STATS']['MEMORY']['VIRTUAL']['USED'].get("FONT_SIZE", 10),
-                font_color=config.THEME_DATA['STATS']['MEMORY']['VIRTUAL']['USED'].get("FONT_COLOR", (0, 0, 0)),
+                font_color=value_font_color(config.THEME_DATA['STATS']['MEMORY']['VIRTUAL']['USED'], stale),
                 background_color=config.THEME_DATA['STATS']['MEMORY']['VIRTUAL']['USED'].get("BACKGROUND_COLOR",
                                                                                              (255, 255, 255)),
                 background_image=get_full_path(config.THEME_DATA['PATH'],
@@ -470,9 +509,7 @@ class Memory:
             )
 
         if config.THEME_DATA['STATS']['MEMORY']['VIRTUAL']['FREE'].get("SHOW", False):
-            virtual_free = sensors.Memory.virtual_free()
-
-            virtual_free_text = f"{int(virtual_free / 1000000):>5}"
+            virtual_free_text = f"{int(memory_stats.virtual_free / 1000000):>5}"
             if config.THEME_DATA['STATS']['MEMORY']['VIRTUAL']['FREE'].get("SHOW_UNIT", True):
                 virtual_free_text += " M"
 
@@ -483,7 +520,7 @@ class Memory:
                 font=config.THEME_DATA['STATS']['MEMORY']['VIRTUAL']['FREE'].get("FONT",
                                                                                  "roboto-mono/RobotoMono-Regular.ttf"),
                 font_size=config.THEME_DATA['STATS']['MEMORY']['VIRTUAL']['FREE'].get("FONT_SIZE", 10),
-                font_color=config.THEME_DATA['STATS']['MEMORY']['VIRTUAL']['FREE'].get("FONT_COLOR", (0, 0, 0)),
+                font_color=value_font_color(config.THEME_DATA['STATS']['MEMORY']['VIRTUAL']['FREE'], stale),
                 background_color=config.THEME_DATA['STATS']['MEMORY']['VIRTUAL']['FREE'].get("BACKGROUND_COLOR",
                                                                                              (255, 255, 255)),
                 background_image=get_full_path(config.THEME_DATA['PATH'],
@@ -495,15 +532,15 @@ class Memory:
 class Disk:
     @staticmethod
     def stats():
-        used = sensors.Disk.disk_used()
-        free = sensors.Disk.disk_free()
+        disk_stats = sensors.Disk.stats()
+        stale = sensors_cache.cache.is_stale("Disk.stats")
         if config.THEME_DATA['STATS']['DISK']['USED']['GRAPH'].get("SHOW", False):
             display.lcd.DisplayProgressBar(
                 x=config.THEME_DATA['STATS']['DISK']['USED']['GRAPH'].get("X", 0),
                 y=config.THEME_DATA['STATS']['DISK']['USED']['GRAPH'].get("Y", 0),
                 width=config.THEME_DATA['STATS']['DISK']['USED']['GRAPH'].get("WIDTH", 0),
                 height=config.THEME_DATA['STATS']['DISK']['USED']['GRAPH'].get("HEIGHT", 0),
-                value=int(sensors.Disk.disk_usage_percent()),
+                value=int(disk_stats.usage_percent),
                 min_value=config.THEME_DATA['STATS']['DISK']['USED']['GRAPH'].get("MIN_VALUE", 0),
                 max_value=config.THEME_DATA['STATS']['DISK']['USED']['GRAPH'].get("MAX_VALUE", 100),
                 bar_color=config.THEME_DATA['STATS']['DISK']['USED']['GRAPH'].get("BAR_COLOR", (0, 0, 0)),
@@ -517,7 +554,7 @@ class Disk:
             )
 
         if config.THEME_DATA['STATS']['DISK']['USED']['TEXT'].get("SHOW", False):
-            used_text = f"{int(used / 1000000000):>5}"
+            used_text = f"{int(disk_stats.used / 1000000000):>5}"
             if config.THEME_DATA['STATS']['DISK']['USED']['TEXT'].get("SHOW_UNIT", True):
                 used_text += " G"
 
@@ -528,7 +565,7 @@ class Disk:
                 font=config.THEME_DATA['STATS']['DISK']['USED']['TEXT'].get("FONT",
                                                                             "roboto-mono/RobotoMono-Regular.ttf"),
                 font_size=config.THEME_DATA['STATS']['DISK']['USED']['TEXT'].get("FONT_SIZE", 10),
-                font_color=config.THEME_DATA['STATS']['DISK']['USED']['TEXT'].get("FONT_COLOR", (0, 0, 0)),
+                font_color=value_font_color(config.THEME_DATA['STATS']['DISK']['USED']['TEXT'], stale),
                 background_color=config.THEME_DATA['STATS']['DISK']['USED']['TEXT'].get("BACKGROUND_COLOR",
                                                                                         (255, 255, 255)),
                 background_image=get_full_path(config.THEME_DATA['PATH'],
@@ -538,7 +575,7 @@ class Disk:
             )
 
         if config.THEME_DATA['STATS']['DISK']['USED']['PERCENT_TEXT'].get("SHOW", False):
-            percent_text = f"{int(sensors.Disk.disk_usage_percent()):>3}"
+            percent_text = f"{int(disk_stats.usage_percent):>3}"
             if config.THEME_DATA['STATS']['DISK']['USED']['PERCENT_TEXT'].get("SHOW_UNIT", True):
                 percent_text += "%"
 
@@ -549,7 +586,7 @@ class Disk:
                 font=config.THEME_DATA['STATS']['DISK']['USED']['PERCENT_TEXT'].get("FONT",
                                                                                     "roboto-mono/RobotoMono-Regular.ttf"),
                 font_size=config.THEME_DATA['STATS']['DISK']['USED']['PERCENT_TEXT'].get("FONT_SIZE", 10),
-                font_color=config.THEME_DATA['STATS']['DISK']['USED']['PERCENT_TEXT'].get("FONT_COLOR", (0, 0, 0)),
+                font_color=value_font_color(config.THEME_DATA['STATS']['DISK']['USED']['PERCENT_TEXT'], stale),
                 background_color=config.THEME_DATA['STATS']['DISK']['USED']['PERCENT_TEXT'].get("BACKGROUND_COLOR",
                                                                                                 (255, 255, 255)),
                 background_image=get_full_path(config.THEME_DATA['PATH'],
@@ -559,7 +596,7 @@ class Disk:
             )
 
         if config.THEME_DATA['STATS']['DISK']['TOTAL']['TEXT'].get("SHOW", False):
-            total_text = f"{int((free + used) / 1000000000):>5}"
+            total_text = f"{int((disk_stats.free + disk_stats.used) / 1000000000):>5}"
             if config.THEME_DATA['STATS']['DISK']['TOTAL']['TEXT'].get("SHOW_UNIT", True):
                 total_text += " G"
 
@@ -570,7 +607,7 @@ class Disk:
                 font=config.THEME_DATA['STATS']['DISK']['TOTAL']['TEXT'].get("FONT",
                                                                              "roboto-mono/RobotoMono-Regular.ttf"),
                 font_size=config.THEME_DATA['STATS']['DISK']['TOTAL']['TEXT'].get("FONT_SIZE", 10),
-                font_color=config.THEME_DATA['STATS']['DISK']['TOTAL']['TEXT'].get("FONT_COLOR", (0, 0, 0)),
+                font_color=value_font_color(config.THEME_DATA['STATS']['DISK']['TOTAL']['TEXT'], stale),
                 background_color=config.THEME_DATA['STATS']['DISK']['TOTAL']['TEXT'].get("BACKGROUND_COLOR",
                                                                                          (255, 255, 255)),
                 background_image=get_full_path(config.THEME_DATA['PATH'],
@@ -580,7 +617,7 @@ class Disk:
             )
 
         if config.THEME_DATA['STATS']['DISK']['FREE']['TEXT'].get("SHOW", False):
-            free_text = f"{int(free / 1000000000):>5}"
+            free_text = f"{int(disk_stats.free / 1000000000):>5}"
             if config.THEME_DATA['STATS']['DISK']['FREE']['TEXT'].get("SHOW_UNIT", True):
                 free_text += " G"
 
@@ -591,7 +628,7 @@ class Disk:
                 font=config.THEME_DATA['STATS']['DISK']['FREE']['TEXT'].get("FONT",
                                                                             "roboto-mono/RobotoMono-Regular.ttf"),
                 font_size=config.THEME_DATA['STATS']['DISK']['FREE']['TEXT'].get("FONT_SIZE", 10),
-                font_color=config.THEME_DATA['STATS']['DISK']['FREE']['TEXT'].get("FONT_COLOR", (0, 0, 0)),
+                font_color=value_font_color(config.THEME_DATA['STATS']['DISK']['FREE']['TEXT'], stale),
                 background_color=config.THEME_DATA['STATS']['DISK']['FREE']['TEXT'].get("BACKGROUND_COLOR",
                                                                                         (255, 255, 255)),
                 background_image=get_full_path(config.THEME_DATA['PATH'],
@@ -601,156 +638,91 @@ class Disk:
             )
 
 
-class Net:
-    @staticmethod
-    def stats():
-        interval = config.THEME_DATA['STATS']['CPU']['PERCENTAGE'].get("INTERVAL", None)
-        upload_wlo, uploaded_wlo, download_wlo, downloaded_wlo = sensors.Net.stats(WLO_CARD, interval)
+def net_interfaces():
+    # Network interfaces displayed by the theme, as (theme section, interface name): WLO and ETH sections display the
+    # cards set in config.yaml, other sections of NET stats display the interface set in their INTERFACE entry
+    # Sections without any displayed element are ignored, so that their interface is not read
+    interfaces = [('WLO', WLO_CARD), ('ETH', ETH_CARD)]
+    for (section, theme_data) in config.THEME_DATA['STATS']['NET'].items():
+        if section not in ['WLO', 'ETH'] and isinstance(theme_data, dict) and theme_data.get("INTERFACE", ""):
+            interfaces.append((section, theme_data["INTERFACE"]))
+    return [(section, if_name) for (section, if_name) in interfaces if config.is_shown('NET', section)]
 
-        if config.THEME_DATA['STATS']['NET']['WLO']['UPLOAD']['TEXT'].get("SHOW", False):
-            upload_wlo_text = f"{bytes2human(upload_wlo, '%(value).1f %(symbol)s/s')}"
-            display.lcd.DisplayText(
-                text=f"{upload_wlo_text:>10}",
-                x=config.THEME_DATA['STATS']['NET']['WLO']['UPLOAD']['TEXT'].get("X", 0),
-                y=config.THEME_DATA['STATS']['NET']['WLO']['UPLOAD']['TEXT'].get("Y", 0),
-                font=config.THEME_DATA['STATS']['NET']['WLO']['UPLOAD']['TEXT'].get("FONT",
-                                                                                    "roboto-mono/RobotoMono-Regular.ttf"),
-                font_size=config.THEME_DATA['STATS']['NET']['WLO']['UPLOAD']['TEXT'].get("FONT_SIZE", 10),
-                font_color=config.THEME_DATA['STATS']['NET']['WLO']['UPLOAD']['TEXT'].get("FONT_COLOR", (0, 0, 0)),
-                background_color=config.THEME_DATA['STATS']['NET']['WLO']['UPLOAD']['TEXT'].get("BACKGROUND_COLOR",
-                                                                                                (255, 255, 255)),
-                background_image=get_full_path(config.THEME_DATA['PATH'],
-                                               config.THEME_DATA['STATS']['NET']['WLO']['UPLOAD']['TEXT'].get(
-                                                   "BACKGROUND_IMAGE",
-                                                   None))
-            )
 
-        if config.THEME_DATA['STATS']['NET']['WLO']['UPLOADED']['TEXT'].get("SHOW", False):
-            uploaded_wlo_text = f"{bytes2human(uploaded_wlo)}"
-            display.lcd.DisplayText(
-                text=f"{uploaded_wlo_text:>6}",
-                x=config.THEME_DATA['STATS']['NET']['WLO']['UPLOADED']['TEXT'].get("X", 0),
-                y=config.THEME_DATA['STATS']['NET']['WLO']['UPLOADED']['TEXT'].get("Y", 0),
-                font=config.THEME_DATA['STATS']['NET']['WLO']['UPLOADED']['TEXT'].get("FONT",
-                                                                                      "roboto-mono/RobotoMono-Regular.ttf"),
-                font_size=config.THEME_DATA['STATS']['NET']['WLO']['UPLOADED']['TEXT'].get("FONT_SIZE", 10),
-                font_color=config.THEME_DATA['STATS']['NET']['WLO']['UPLOADED']['TEXT'].get("FONT_COLOR", (0, 0, 0)),
-                background_color=config.THEME_DATA['STATS']['NET']['WLO']['UPLOADED']['TEXT'].get("BACKGROUND_COLOR",
-                                                                                                  (255, 255, 255)),
-                background_image=get_full_path(config.THEME_DATA['PATH'],
-                                               config.THEME_DATA['STATS']['NET']['WLO']['UPLOADED']['TEXT'].get(
-                                                   "BACKGROUND_IMAGE",
-                                                   None))
-            )
+# Theme the settings below have been computed for: they are computed again if the theme is reloaded (e.g. theme editor)
+THEME_SETTINGS_DATA = None
+NET_INTERFACES = []
 
-        if config.THEME_DATA['STATS']['NET']['WLO']['DOWNLOAD']['TEXT'].get("SHOW", False):
-            download_wlo_text = f"{bytes2human(download_wlo, '%(value).1f %(symbol)s/s')}"
-            display.lcd.DisplayText(
-                text=f"{download_wlo_text:>10}",
-                x=config.THEME_DATA['STATS']['NET']['WLO']['DOWNLOAD']['TEXT'].get("X", 0),
-                y=config.THEME_DATA['STATS']['NET']['WLO']['DOWNLOAD']['TEXT'].get("Y", 0),
-                font=config.THEME_DATA['STATS']['NET']['WLO']['DOWNLOAD']['TEXT'].get("FONT",
-                                                                                      "roboto-mono/RobotoMono-Regular.ttf"),
-                font_size=config.THEME_DATA['STATS']['NET']['WLO']['DOWNLOAD']['TEXT'].get("FONT_SIZE", 10),
-                font_color=config.THEME_DATA['STATS']['NET']['WLO']['DOWNLOAD']['TEXT'].get("FONT_COLOR", (0, 0, 0)),
-                background_color=config.THEME_DATA['STATS']['NET']['WLO']['DOWNLOAD']['TEXT'].get("BACKGROUND_COLOR",
-                                                                                                  (255, 255, 255)),
-                background_image=get_full_path(config.THEME_DATA['PATH'],
-                                               config.THEME_DATA['STATS']['NET']['WLO']['DOWNLOAD']['TEXT'].get(
-                                                   "BACKGROUND_IMAGE",
-                                                   None))
-            )
 
-        if config.THEME_DATA['STATS']['NET']['WLO']['DOWNLOADED']['TEXT'].get("SHOW", False):
-            downloaded_wlo_text = f"{bytes2human(downloaded_wlo)}"
-            display.lcd.DisplayText(
-                text=f"{downloaded_wlo_text:>6}",
-                x=config.THEME_DATA['STATS']['NET']['WLO']['DOWNLOADED']['TEXT'].get("X", 0),
-                y=config.THEME_DATA['STATS']['NET']['WLO']['DOWNLOADED']['TEXT'].get("Y", 0),
-                font=config.THEME_DATA['STATS']['NET']['WLO']['DOWNLOADED']['TEXT'].get("FONT",
-                                                                                        "roboto-mono/RobotoMono-Regular.ttf"),
-                font_size=config.THEME_DATA['STATS']['NET']['WLO']['DOWNLOADED']['TEXT'].get("FONT_SIZE", 10),
-                font_color=config.THEME_DATA['STATS']['NET']['WLO']['DOWNLOADED']['TEXT'].get("FONT_COLOR", (0, 0, 0)),
-                background_color=config.THEME_DATA['STATS']['NET']['WLO']['DOWNLOADED']['TEXT'].get("BACKGROUND_COLOR",
-                                                                                                    (255, 255, 255)),
-                background_image=get_full_path(config.THEME_DATA['PATH'],
-                                               config.THEME_DATA['STATS']['NET']['WLO']['DOWNLOADED']['TEXT'].get(
-                                                   "BACKGROUND_IMAGE",
-                                                   None))
-            )
+def load_theme_settings():
+    global THEME_SETTINGS_DATA, NET_INTERFACES
+    if THEME_SETTINGS_DATA is config.THEME_DATA:
+        return
+    THEME_SETTINGS_DATA = config.THEME_DATA
 
-        upload_eth, uploaded_eth, download_eth, downloaded_eth = sensors.Net.stats(ETH_CARD, interval)
+    # Sensors are read through a cache shared by all consumers. A value is reused by the consumers asking for it within
+    # half of its theme refresh interval: each periodic refresh still gets a new value despite the scheduling jitter
+    # A read lasting more than half of the refresh interval (e.g. hung nvidia-smi, unreachable network mount) gives the
+    # previous value instead, so that a slow sensor never blocks the refresh of the display
+    for (metric, theme_stats) in [
+        ("Cpu.percentage", config.THEME_DATA['STATS']['CPU']['PERCENTAGE']),
+        ("Cpu.frequency", config.THEME_DATA['STATS']['CPU']['FREQUENCY']),
+        ("Cpu.load", config.THEME_DATA['STATS']['CPU']['LOAD']),
+        ("Cpu.temperature", config.THEME_DATA['STATS']['CPU']['TEMPERATURE']),
+        ("Gpu.stats", config.THEME_DATA['STATS']['GPU']),
+        ("Gpu.devices_stats", config.THEME_DATA['STATS']['GPU']),
+        ("Memory.stats", config.THEME_DATA['STATS']['MEMORY']),
+        ("Disk.stats", config.THEME_DATA['STATS']['DISK']),
+        ("Net.interfaces_stats", config.THEME_DATA['STATS']['NET']),
+    ]:
+        interval = theme_stats.get("INTERVAL", 0)
+        sensors_cache.cache.set_ttl(metric, interval / 2)
+        sensors_cache.cache.set_deadline(metric, interval / 2 if interval > 0 else None)
 
-        if config.THEME_DATA['STATS']['NET']['ETH']['UPLOAD']['TEXT'].get("SHOW", False):
-            upload_eth_text = f"{bytes2human(upload_eth, '%(value).1f %(symbol)s/s')}"
-            display.lcd.DisplayText(
-                text=f"{upload_eth_text:>10}",
-                x=config.THEME_DATA['STATS']['NET']['ETH']['UPLOAD']['TEXT'].get("X", 0),
-                y=config.THEME_DATA['STATS']['NET']['ETH']['UPLOAD']['TEXT'].get("Y", 0),
-                font=config.THEME_DATA['STATS']['NET']['ETH']['UPLOAD']['TEXT'].get("FONT",
-                                                                                    "roboto-mono/RobotoMono-Regular.ttf"),
-                font_size=config.THEME_DATA['STATS']['NET']['ETH']['UPLOAD']['TEXT'].get("FONT_SIZE", 10),
-                font_color=config.THEME_DATA['STATS']['NET']['ETH']['UPLOAD']['TEXT'].get("FONT_COLOR", (0, 0, 0)),
-                background_color=config.THEME_DATA['STATS']['NET']['ETH']['UPLOAD']['TEXT'].get("BACKGROUND_COLOR",
-                                                                                                (255, 255, 255)),
-                background_image=get_full_path(config.THEME_DATA['PATH'],
-                                               config.THEME_DATA['STATS']['NET']['ETH']['UPLOAD']['TEXT'].get(
-                                                   "BACKGROUND_IMAGE",
-                                                   None))
-            )
+    # Sensors sampling GPUs in the background (e.g. nvidia-smi) do it at the theme refresh interval
+    if config.THEME_DATA['STATS']['GPU'].get("INTERVAL", 0) > 0:
+        sensors.backend.Gpu.set_interval(config.THEME_DATA['STATS']['GPU']["INTERVAL"])
 
-        if config.THEME_DATA['STATS']['NET']['ETH']['UPLOADED']['TEXT'].get("SHOW", False):
-            uploaded_eth_text = f"{bytes2human(uploaded_eth)}"
-            display.lcd.DisplayText(
-                text=f"{uploaded_eth_text:>6}",
-                x=config.THEME_DATA['STATS']['NET']['ETH']['UPLOADED']['TEXT'].get("X", 0),
-                y=config.THEME_DATA['STATS']['NET']['ETH']['UPLOADED']['TEXT'].get("Y", 0),
-                font=config.THEME_DATA['STATS']['NET']['ETH']['UPLOADED']['TEXT'].get("FONT",
-                                                                                      "roboto-mono/RobotoMono-Regular.ttf"),
-                font_size=config.THEME_DATA['STATS']['NET']['ETH']['UPLOADED']['TEXT'].get("FONT_SIZE", 10),
-                font_color=config.THEME_DATA['STATS']['NET']['ETH']['UPLOADED']['TEXT'].get("FONT_COLOR", (0, 0, 0)),
-                background_color=config.THEME_DATA['STATS']['NET']['ETH']['UPLOADED']['TEXT'].get("BACKGROUND_COLOR",
-                                                                                                  (255, 255, 255)),
-                background_image=get_full_path(config.THEME_DATA['PATH'],
-                                               config.THEME_DATA['STATS']['NET']['ETH']['UPLOADED']['TEXT'].get(
-                                                   "BACKGROUND_IMAGE",
-                                                   None))
-            )
+    NET_INTERFACES = net_interfaces()
 
-        if config.THEME_DATA['STATS']['NET']['ETH']['DOWNLOAD']['TEXT'].get("SHOW", False):
-            download_eth_text = f"{bytes2human(download_eth, '%(value).1f %(symbol)s/s')}"
-            display.lcd.DisplayText(
-                text=f"{download_eth_text:>10}",
-                x=config.THEME_DATA['STATS']['NET']['ETH']['DOWNLOAD']['TEXT'].get("X", 0),
-                y=config.THEME_DATA['STATS']['NET']['ETH']['DOWNLOAD']['TEXT'].get("Y", 0),
-                font=config.THEME_DATA['STATS']['NET']['ETH']['DOWNLOAD']['TEXT'].get("FONT",
-                                                                                      "roboto-mono/RobotoMono-Regular.ttf"),
-                font_size=config.THEME_DATA['STATS']['NET']['ETH']['DOWNLOAD']['TEXT'].get("FONT_SIZE", 10),
-                font_color=config.THEME_DATA['STATS']['NET']['ETH']['DOWNLOAD']['TEXT'].get("FONT_COLOR", (0, 0, 0)),
-                background_color=config.THEME_DATA['STATS']['NET']['ETH']['DOWNLOAD']['TEXT'].get("BACKGROUND_COLOR",
-                                                                                                  (255, 255, 255)),
-                background_image=get_full_path(config.THEME_DATA['PATH'],
-                                               config.THEME_DATA['STATS']['NET']['ETH']['DOWNLOAD']['TEXT'].get(
-                                                   "BACKGROUND_IMAGE",
-                                                   None))
-            )
 
-        if config.THEME_DATA['STATS']['NET']['ETH']['DOWNLOADED']['TEXT'].get("SHOW", False):
-            downloaded_eth_text = f"{bytes2human(downloaded_eth)}"
+load_theme_settings()
+
+
+class Net:
+    @staticmethod
+    def stats():
+        load_theme_settings()
+
+        # Read all interfaces at once
+        if_names = tuple(if_name for (_, if_name) in NET_INTERFACES)
+        interfaces_stats = sensors.Net.interfaces_stats(if_names)
+        stale = sensors_cache.cache.is_stale("Net.interfaces_stats", if_names)
+
+        for (section, if_name) in NET_INTERFACES:
+            upload, uploaded, download, downloaded = interfaces_stats[if_name]
+            theme_data = config.THEME_DATA['STATS']['NET'][section]
+
+            Net.display_text(theme_data.get('UPLOAD', {}),
+                             f"{bytes2human(upload, '%(value).1f %(symbol)s/s'):>10}", stale)
+            Net.display_text(theme_data.get('UPLOADED', {}), f"{bytes2human(uploaded):>6}", stale)
+            Net.display_text(theme_data.get('DOWNLOAD', {}),
+                             f"{bytes2human(download, '%(value).1f %(symbol)s/s'):>10}", stale)
+            Net.display_text(theme_data.get('DOWNLOADED', {}), f"{bytes2human(downloaded):>6}", stale)
+
+    @staticmethod
+    def display_text(theme_data, text, stale=False):
+        if theme_data.get('TEXT', {}).get("SHOW", False):
             display.lcd.DisplayText(
-                text=f"{downloaded_eth_text:>6}",
-                x=config.THEME_DATA['STATS']['NET']['ETH']['DOWNLOADED']['TEXT'].get("X", 0),
-                y=config.THEME_DATA['STATS']['NET']['ETH']['DOWNLOADED']['TEXT'].get("Y", 0),
-                font=config.THEME_DATA['STATS']['NET']['ETH']['DOWNLOADED']['TEXT'].get("FONT",
-                                                                                        "roboto-mono/RobotoMono-Regular.ttf"),
-                font_size=config.THEME_DATA['STATS']['NET']['ETH']['DOWNLOADED']['TEXT'].get("FONT_SIZE", 10),
-                font_color=config.THEME_DATA['STATS']['NET']['ETH']['DOWNLOADED']['TEXT'].get("FONT_COLOR", (0, 0, 0)),
-                background_color=config.THEME_DATA['STATS']['NET']['ETH']['DOWNLOADED']['TEXT'].get("BACKGROUND_COLOR",
-                                                                                                    (255, 255, 255)),
-                background_image=get_full_path(config.THEME_DATA['PATH'],
-                                               config.THEME_DATA['STATS']['NET']['ETH']['DOWNLOADED']['TEXT'].get(
-                                                   "BACKGROUND_IMAGE",
-                                                   None))
+                text=text,
+                x=theme_data['TEXT'].get("X", 0),
+                y=theme_data['TEXT'].get("Y", 0),
+                font=theme_data['TEXT'].get("FONT", "roboto-mono/RobotoMono-Regular.ttf"),
+                font_size=theme_data['TEXT'].get("FONT_SIZE", 10),
+                font_color=value_font_color(theme_data['TEXT'], stale),
+                background_color=theme_data['TEXT'].get("BACKGROUND_COLOR", (255, 255, 255)),
+                background_image=get_full_path(config.THEME_DATA['PATH'],
+                                               theme_data['TEXT'].get("BACKGROUND_IMAGE", None))
             )
 
 
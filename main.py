@@ -53,6 +53,7 @@ except:
     pass
 
 from library.log import logger
+import library.config as config
 import library.scheduler as scheduler
 from library.display import display
 
@@ -70,7 +71,7 @@ if __name__ == "__main__":
 
         # Do not stop the program now in case data transmission was in progress
         # Instead, ask the scheduler to empty the action queue before stopping
-        scheduler.STOPPING = True
+        scheduler.stop()
 
         # Allow 5 seconds max. delay in case scheduler is not responding
         wait_time = 5
@@ -183,22 +184,30 @@ if __name__ == "__main__":
     # Create all static texts
     display.display_static_text()
 
-    # Run our jobs that update data
+    # Run our jobs that update data, only for the stats displayed by the theme
     import library.stats as stats
 
-    scheduler.CPUPercentage()
-    scheduler.CPUFrequency()
-    scheduler.CPULoad()
-    if stats.CPU.is_temperature_available():
-        scheduler.CPUTemperature()
-    else:
-        logger.warning("Your CPU temperature is not supported yet")
-    if stats.Gpu.is_available():
+    if config.is_shown('CPU', 'PERCENTAGE'):
+        scheduler.CPUPercentage()
+    if config.is_shown('CPU', 'FREQUENCY'):
+        scheduler.CPUFrequency()
+    if config.is_shown('CPU', 'LOAD'):
+        scheduler.CPULoad()
+    if config.is_shown('CPU', 'TEMPERATURE'):
+        if stats.CPU.is_temperature_available():
+            scheduler.CPUTemperature()
+        else:
+            logger.warning("Your CPU temperature is not supported yet")
+    if config.is_shown('GPU') and stats.Gpu.is_available():
         scheduler.GpuStats()
-    scheduler.MemoryStats()
-    scheduler.DiskStats()
-    scheduler.NetStats()
-    scheduler.DateStats()
+    if config.is_shown('MEMORY'):
+        scheduler.MemoryStats()
+    if config.is_shown('DISK'):
+        scheduler.DiskStats()
+    if config.is_shown('NET'):
+        scheduler.NetStats()
+    if config.is_shown('DATE'):
+        scheduler.DateStats()
     scheduler.QueueHandler()
 
     if tray_icon and platform.system() == "Darwin":  # macOS-specific
@@ -85,6 +85,7 @@ def refresh_theme():
 
     # Display all data on screen once
     import library.stats as stats
+    stats.load_theme_settings()
     stats.CPU.percentage()
     stats.CPU.frequency()
     stats.CPU.load()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# turing-smart-screen-python - a Python system monitor and library for 3.5" USB-C displays like Turing Smart Screen or XuanFang
+# https://github.com/mathoudebine/turing-smart-screen-python/
+
+# Copyright (C) 2021-2023  Matthieu Houdebine (mathoudebine)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# benchmark-hwmon.py: Compare the time needed to read the CPU temperature with psutil.sensors_temperatures() and with
+# the sysfs hwmon reader keeping temperature input files open
+# A fake sysfs tree is generated in a temporary directory so that the benchmark gives the same results on any machine
+# psutil reads sysfs on Linux only: on other platforms only the hwmon reader is measured
+# Run from the root of the project: python tools/benchmark-hwmon.py
+
+import argparse
+import glob
+import os
+import platform
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import psutil
+
+from library.sensors.sensors_hwmon import HwmonReader
+
+
+def write_file(path: str, content: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wt") as stream:
+        stream.write(content + "\n")
+
+
+def create_fake_sysfs(root: str, cores: int, other_chips: int):
+    # CPU package + cores temperatures, like Intel CPUs
+    hwmon = os.path.join(root, "class", "hwmon", "hwmon0")
+    write_file(os.path.join(hwmon, "name"), "coretemp")
+    for i in range(cores + 1):
+        label = "Package id 0" if i == 0 else "Core %d" % (i - 1)
+        write_file(os.path.join(hwmon, "temp%d_input" % (i + 1)), str(45000 + i * 1000))
+        write_file(os.path.join(hwmon, "temp%d_label" % (i + 1)), label)
+        write_file(os.path.join(hwmon, "temp%d_max" % (i + 1)), "100000")
+        write_file(os.path.join(hwmon, "temp%d_crit" % (i + 1)), "105000")
+
+    # Other chips of a typical machine (NVMe drives, ACPI, Wi-Fi, GPU...)
+    for i in range(other_chips):
+        hwmon = os.path.join(root, "class", "hwmon", "hwmon%d" % (i + 1))
+        write_file(os.path.join(hwmon, "name"), "chip%d" % i)
+        for j in range(3):
+            write_file(os.path.join(hwmon, "temp%d_input" % (j + 1)), str(30000 + j * 1000))
+            write_file(os.path.join(hwmon, "temp%d_label" % (j + 1)), "Sensor %d" % j)
+            write_file(os.path.join(hwmon, "temp%d_crit" % (j + 1)), "90000")
+
+
+def psutil_cpu_temperature() -> float:
+    # Same as sensors_python.Cpu.temperature() before the hwmon reader
+    sensors_temps = psutil.sensors_temperatures()
+    return sensors_temps['coretemp'][0].current
+
+
+def measure(func, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations
+
+
+class FakeSysfsGlob:
+    # Replaces the glob module used by psutil, to redirect /sys paths to the fake sysfs tree
+    def __init__(self, root: str):
+        self.root = root
+
+    def glob(self, pattern: str, **kwargs):
+        if pattern.startswith("/sys/"):
+            pattern = os.path.join(self.root, pattern[len("/sys/"):])
+        return glob.glob(pattern, **kwargs)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark CPU temperature reading from sysfs")
+    parser.add_argument("--cores", type=int, default=16, help="number of CPU cores of the fake CPU")
+    parser.add_argument("--chips", type=int, default=8, help="number of other hwmon chips in the fake sysfs")
+    parser.add_argument("--iterations", type=int, default=2000, help="number of temperature reads")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as sysfs_root:
+        create_fake_sysfs(sysfs_root, args.cores, args.chips)
+
+        print("%-40s %14s" % ("CPU temperature reader", "Time per read"))
+
+        if platform.system() == "Linux":
+            import psutil._pslinux
+
+            psutil._pslinux.glob = FakeSysfsGlob(sysfs_root)
+            duration = measure(psutil_cpu_temperature, args.iterations)
+            print("%-40s %12.1fus" % ("psutil.sensors_temperatures()", duration * 1000000))
+
+        start = time.perf_counter()
+        reader = HwmonReader(sysfs_root)
+        discovery_time = time.perf_counter() - start
+
+        if platform.system() == "Linux":
+            assert reader.cpu_temperature() == psutil_cpu_temperature(), "Readers do not give the same temperature"
+
+        duration = measure(reader.cpu_temperature, args.iterations)
+        print("%-40s %12.1fus (+ %.1fus once to discover inputs)" % (
+            "HwmonReader.cpu_temperature()", duration * 1000000, discovery_time * 1000000))
+        duration = measure(reader.temperatures, args.iterations)
+        print("%-40s %12.1fus" % ("HwmonReader.temperatures() (all inputs)", duration * 1000000))
+        reader.close()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# turing-smart-screen-python - a Python system monitor and library for 3.5" USB-C displays like Turing Smart Screen or XuanFang
+# https://github.com/mathoudebine/turing-smart-screen-python/
+
+# Copyright (C) 2021-2023  Matthieu Houdebine (mathoudebine)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# benchmark-queue-handler.py: Compare the queue handler processing the serial requests with the previous design
+# (queue handler re-scheduled every 1ms with sched, one request per run)
+# Measures CPU usage when the queue is idle, max. number of requests processed per second and time needed to stop
+# Run from the root of the project: python tools/benchmark-queue-handler.py
+
+import argparse
+import os
+import queue
+import sched
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from library.lcd.lcd_comm import LcdComm
+from library.lcd.update_queue import UpdateQueue, STOP_REQUEST
+
+
+class PreviousQueueHandler:
+    # Queue handler as it was before: run every 1ms by a sched scheduler, one request per run
+    def __init__(self, update_queue: queue.Queue):
+        self.update_queue = update_queue
+        self.stopping = False
+        self.thread = threading.Thread(target=self.run)
+
+    def run(self):
+        scheduler = sched.scheduler(time.time, time.sleep)
+        self.periodic(scheduler, 0.001)
+        scheduler.run()
+
+    def periodic(self, scheduler, interval):
+        if not self.stopping:
+            scheduler.enter(interval, 1, self.periodic, (scheduler, interval))
+        self.handle_queue()
+
+    def handle_queue(self):
+        if self.stopping:
+            while not self.update_queue.empty():
+                f, args = self.update_queue.get()
+                if f:
+                    f(*args)
+        else:
+            f, args = self.update_queue.get()
+            if f:
+                f(*args)
+
+    def stop(self):
+        self.stopping = True
+        # Wake up the thread waiting for a request
+        self.update_queue.put((None, []))
+
+
+class QueueHandler:
+    # Current queue handler: waits for requests and processes all waiting requests at once, stops on STOP_REQUEST
+    def __init__(self, update_queue: queue.Queue):
+        self.update_queue = update_queue
+        self.thread = threading.Thread(target=self.run)
+
+    def run(self):
+        while LcdComm.ProcessQueue(self.update_queue):
+            pass
+
+    def stop(self):
+        self.update_queue.put(STOP_REQUEST)
+
+
+def benchmark(handler_class, update_queue: queue.Queue, idle_time: float, request_count: int):
+    processed = [0]
+    done = threading.Event()
+
+    def request():
+        processed[0] += 1
+        if processed[0] == request_count:
+            done.set()
+
+    handler = handler_class(update_queue)
+    handler.thread.start()
+
+    # CPU time used by the whole process while the queue is empty
+    start_cpu = time.process_time()
+    time.sleep(idle_time)
+    idle_cpu = (time.process_time() - start_cpu) / idle_time * 100
+
+    # Requests processed per second when many requests are queued at once
+    start = time.perf_counter()
+    for _ in range(request_count):
+        update_queue.put((request, []))
+    done.wait()
+    throughput = request_count / (time.perf_counter() - start)
+
+    # Time needed for the handler thread to stop once asked to
+    start = time.perf_counter()
+    handler.stop()
+    handler.thread.join()
+    stop_time = time.perf_counter() - start
+
+    return idle_cpu, throughput, stop_time
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the queue handler processing the serial requests")
+    parser.add_argument("--idle-time", type=float, default=5, help="time (s) to measure CPU usage when idle")
+    parser.add_argument("--requests", type=int, default=20000, help="number of requests to process")
+    args = parser.parse_args()
+
+    print("%-30s %12s %16s %12s" % ("Queue handler", "Idle CPU", "Requests/s", "Stop time"))
+    for (name, handler_class, update_queue) in [
+        ("Previous (1ms sched)", PreviousQueueHandler, queue.Queue()),
+        ("Current (queue.Queue)", QueueHandler, queue.Queue()),
+        ("Current (UpdateQueue)", QueueHandler, UpdateQueue()),
+    ]:
+        (idle_cpu, throughput, stop_time) = benchmark(handler_class, update_queue, args.idle_time, args.requests)
+        print("%-30s %11.2f%% %16.0f %10.1fms" % (name, idle_cpu, throughput, stop_time * 1000))
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# turing-smart-screen-python - a Python system monitor and library for 3.5" USB-C displays like Turing Smart Screen or XuanFang
+# https://github.com/mathoudebine/turing-smart-screen-python/
+
+# Copyright (C) 2021-2023  Matthieu Houdebine (mathoudebine)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# check-bitmap-allocations.py: Check with tracemalloc the memory allocated while sending a full screen bitmap
+# Bitmaps are encoded in the bitmap buffer allocated once by the display: sending a bitmap must not allocate another
+# buffer of the size of the frame. Both the NumPy and the pure-Python encoders are checked, for revision A and
+# revision B (with 180° rotation) displays, and the encoded data is checked against a pixel-by-pixel reference
+# Run from the root of the project: python tools/check-bitmap-allocations.py
+
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from PIL import Image
+
+import library.lcd.serialize as serialize
+from library.lcd.lcd_comm import Orientation
+from library.lcd.lcd_comm_rev_a import LcdCommRevA
+from library.lcd.lcd_comm_rev_b import LcdCommRevB
+
+# Max. peak of memory allocated while sending a bitmap, as a ratio of the size of the encoded frame. Only bands of the
+# image are allocated (PIL uses 64KB buffers to get their pixels), never the whole frame
+MAX_PEAK_RATIO = 0.5
+
+
+class NullSerial:
+    # Serial port keeping the data written instead of sending it. Bitmap data are views on the bitmap buffer of the
+    # display: they are only copied after the measurement
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(data)
+
+    def close(self):
+        pass
+
+
+def null_serial_lcd(lcd_class):
+    # Display of this revision writing to a NullSerial
+    class NullSerialLcd(lcd_class):
+        def openSerial(self):
+            self.lcd_serial = NullSerial()
+
+    return NullSerialLcd(display_width=320, display_height=480)
+
+
+def reference_RGB565(image: Image.Image, endianness: str, rotate_180: bool) -> bytes:
+    if rotate_180:
+        image = image.transpose(Image.ROTATE_180)
+    pixels = image.convert("RGB").tobytes()
+    words = bytearray()
+    for i in range(0, len(pixels), 3):
+        (r, g, b) = pixels[i:i + 3]
+        words += (((r >> 3) << 11) | ((g >> 2) << 5) | (b >> 3)).to_bytes(2, endianness)
+    return bytes(words)
+
+
+def check(lcd_class, orientation: Orientation, endianness: str, rotate_180: bool, image: Image.Image) -> bool:
+    lcd = null_serial_lcd(lcd_class)
+    frame_size = image.size[0] * image.size[1] * 2
+
+    # First bitmap is not measured: it may initialize caches (PIL decoders, NumPy...)
+    lcd.SendBitmap(image, 0, 0, orientation)
+    lcd.lcd_serial.chunks = []
+
+    tracemalloc.start()
+    lcd.SendBitmap(image, 0, 0, orientation)
+    (_, peak) = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Bitmap data is the last frame_size bytes written, after the bitmap command
+    data = b"".join(bytes(chunk) for chunk in lcd.lcd_serial.chunks)[-frame_size:]
+    valid = data == reference_RGB565(image, endianness, rotate_180)
+
+    passed = valid and peak <= frame_size * MAX_PEAK_RATIO
+    print("%-12s %-10s %-18s %10d %10d %10s %s" % (
+        lcd_class.__name__, "NumPy" if serialize.np is not None else "Python", orientation.name, frame_size, peak,
+        "OK" if valid else "INVALID", "PASS" if passed else "FAIL"))
+    return passed
+
+
+if __name__ == "__main__":
+    # Full screen image with varied pixels, so that all bits of all channels are checked
+    image = Image.new("RGB", (320, 480))
+    image.putdata([((x * 7 + y) & 255, (x + y * 3) & 255, (x * y) & 255) for y in range(480) for x in range(320)])
+
+    print("%-12s %-10s %-18s %10s %10s %10s %s" % ("Display", "Encoder", "Orientation", "Frame (B)", "Peak (B)",
+                                                   "Data", "Result"))
+    results = []
+    numpy = serialize.np
+    for encoder in ([numpy] if numpy is not None else []) + [None]:
+        serialize.np = encoder
+        results.append(check(LcdCommRevA, Orientation.PORTRAIT, "little", False, image))
+        results.append(check(LcdCommRevB, Orientation.PORTRAIT, "big", False, image))
+        results.append(check(LcdCommRevB, Orientation.REVERSE_PORTRAIT, "big", True, image))
+    serialize.np = numpy
+
+    if not all(results):
+        print("Bitmap encoding allocates too much memory or gives invalid data")
+        sys.exit(1)
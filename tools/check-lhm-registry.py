@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+# turing-smart-screen-python - a Python system monitor and library for 3.5" USB-C displays like Turing Smart Screen or XuanFang
+# https://github.com/mathoudebine/turing-smart-screen-python/
+
+# Copyright (C) 2021-2023  Matthieu Houdebine (mathoudebine)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# check-lhm-registry.py: Check the index of LibreHardwareMonitor hardware and sensors against a fake hardware tree
+# Checks that hardware sensors are walked only once to build the index, that hardware is updated at most once per update
+# period, and that hardware and sensors are found by type and (exact or prefix) name
+# LibreHardwareMonitor is not needed: this tool runs on any platform
+# Run from the root of the project: python tools/check-lhm-registry.py
+
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from library.sensors.sensors_lhm_registry import LhmRegistry
+
+# Update period used for the checks (s): long enough for all lookups of a check to happen within the same period
+UPDATE_PERIOD = 0.2
+
+failures = []
+
+
+def check(name: str, condition: bool):
+    print("%-70s %s" % (name, "PASS" if condition else "FAIL"))
+    if not condition:
+        failures.append(name)
+
+
+class FakeSensor:
+    # Sensor of LibreHardwareMonitor: counts the reads of its name, to detect sensors walked again
+    name_reads = 0
+
+    def __init__(self, sensor_type: str, name: str, value):
+        self.SensorType = sensor_type
+        self._name = name
+        self.Value = value
+
+    @property
+    def Name(self) -> str:
+        FakeSensor.name_reads += 1
+        return self._name
+
+
+class FakeHardware:
+    # Hardware of LibreHardwareMonitor: counts the walks of its sensors and its updates
+    def __init__(self, hardware_type: str, name: str, sensors: list):
+        self.HardwareType = hardware_type
+        self.Name = name
+        self._sensors = sensors
+        self.sensors_walks = 0
+        self.updates = 0
+
+    @property
+    def Sensors(self) -> list:
+        self.sensors_walks += 1
+        return self._sensors
+
+    def Update(self):
+        self.updates += 1
+
+
+def fake_hardware_tree() -> list:
+    return [
+        FakeHardware("Cpu", "AMD Ryzen 7 5800X", [
+            FakeSensor("Load", "CPU Core #1", 5.0),
+            FakeSensor("Load", "CPU Total", 12.5),
+            FakeSensor("Clock", "Core #1", 3000.0),
+            FakeSensor("Clock", "Core #1 (Effective)", 100.0),
+            FakeSensor("Clock", "Core #2", 4000.0),
+            FakeSensor("Temperature", "Core (Tctl/Tdie)", 55.0),
+        ]),
+        FakeHardware("Memory", "Generic Memory", [
+            FakeSensor("Load", "Memory", 40.0),
+            FakeSensor("Data", "Memory Used", None),
+        ]),
+        FakeHardware("GpuNvidia", "NVIDIA GeForce RTX 3070", [FakeSensor("Load", "GPU Core", 33.0)]),
+        FakeHardware("GpuNvidia", "NVIDIA GeForce GTX 1050", [FakeSensor("Load", "GPU Core", 80.0)]),
+    ]
+
+
+def check_indexing():
+    hardware_list = fake_hardware_tree()
+    registry = LhmRegistry(hardware_list, update_period=UPDATE_PERIOD)
+    check("index: sensors of each hardware walked once",
+          all(hardware.sensors_walks == 1 for hardware in hardware_list))
+    check("index: each hardware updated once", all(hardware.updates == 1 for hardware in hardware_list))
+
+    # Lookups never walk hardware sensors again
+    time.sleep(UPDATE_PERIOD)
+    for _ in range(10):
+        registry.value("Cpu", "Load", "CPU Total")
+        registry.value("Cpu", "Clock", "Core #1")
+        registry.hardware("Memory").sensors_of_type("Load")
+    check("lookups: sensors not walked again", all(hardware.sensors_walks == 1 for hardware in hardware_list))
+    check("lookups: hardware updated once per update period", hardware_list[0].updates == 2)
+    check("lookups: hardware not read is not updated", hardware_list[2].updates == 1)
+
+    # Next update period
+    time.sleep(UPDATE_PERIOD)
+    registry.value("Cpu", "Load", "CPU Total")
+    check("lookups: hardware updated again after update period", hardware_list[0].updates == 3)
+
+
+def check_lookups():
+    hardware_list = fake_hardware_tree()
+    registry = LhmRegistry(hardware_list, update_period=UPDATE_PERIOD)
+
+    # Hardware by type and name
+    check("hardware: first hardware of type", registry.hardware("GpuNvidia").hardware is hardware_list[2])
+    check("hardware: by name", registry.hardware("GpuNvidia", "NVIDIA GeForce GTX 1050").hardware is hardware_list[3])
+    check("hardware: unknown name", registry.hardware("GpuNvidia", "NVIDIA GeForce RTX 4090") is None)
+    check("hardware: unknown type", registry.hardware("GpuAmd") is None)
+
+    # Sensors by type and name
+    check("sensor: exact name", registry.value("Cpu", "Load", "CPU Total") == 12.5)
+    check("sensor: exact name preferred to prefix", registry.value("Cpu", "Clock", "Core #1") == 3000.0)
+    check("sensor: same name, other type", registry.value("Memory", "Load", "Memory") == 40.0)
+    check("sensor: name prefix", registry.value("Cpu", "Temperature", "Core") == 55.0)
+    check("sensor: unknown name", registry.sensor("Cpu", "Load", "GPU Core") is None and
+          math.isnan(registry.value("Cpu", "Load", "GPU Core")))
+    check("sensor: no value", math.isnan(registry.value("Memory", "Data", "Memory Used")))
+    check("sensor: unknown hardware", math.isnan(registry.value("GpuAmd", "Load", "GPU Core")))
+    check("sensor: of second hardware of type",
+          registry.hardware("GpuNvidia", "NVIDIA GeForce GTX 1050").value("Load", "GPU Core") == 80.0)
+    check("sensors of type: in LibreHardwareMonitor order",
+          [sensor.Value for sensor in registry.hardware("Cpu").sensors_of_type("Clock")] == [3000.0, 100.0, 4000.0])
+    check("sensors of type: none", registry.hardware("Cpu").sensors_of_type("Throughput") == [])
+
+    # Sensors found by prefix are not searched again
+    FakeSensor.name_reads = 0
+    registry.value("Cpu", "Temperature", "Core")
+    registry.value("Cpu", "Load", "GPU Core")
+    check("sensor: prefix lookups are memoized", FakeSensor.name_reads == 0)
+
+
+if __name__ == "__main__":
+    check_indexing()
+    check_lookups()
+
+    if failures:
+        print("%d check(s) failed" % len(failures))
+        sys.exit(1)
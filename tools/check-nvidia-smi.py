@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+# turing-smart-screen-python - a Python system monitor and library for 3.5" USB-C displays like Turing Smart Screen or XuanFang
+# https://github.com/mathoudebine/turing-smart-screen-python/
+
+# Copyright (C) 2021-2023  Matthieu Houdebine (mathoudebine)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# check-nvidia-smi.py: Check the Nvidia GPU stats reader against fake nvidia-smi scripts printing canned CSV output
+# Checks parsing of nvidia-smi output (including unavailable values and malformed lines), the sampling period given to
+# nvidia-smi, and what happens when nvidia-smi stops or cannot print any stats (e.g. no Nvidia GPU)
+# Fake nvidia-smi scripts are run directly: this tool only runs on Linux / macOS
+# Run from the root of the project: python tools/check-nvidia-smi.py
+
+import logging
+import math
+import os
+import stat
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from library.log import logger
+from library.sensors.sensors_nvidia import NvidiaGpuStats, NvidiaSmiSampler, parse_line
+
+# Fake nvidia-smi: writes its arguments to a file, prints the canned lines, then sleeps (still running) or exits
+FAKE_NVIDIA_SMI = """#!%(python)s
+import sys, time
+with open(%(args_file)r, "w") as stream:
+    stream.write(" ".join(sys.argv[1:]))
+for line in %(lines)r:
+    print(line, flush=True)
+if %(keep_running)r:
+    time.sleep(60)
+sys.exit(%(exit_code)r)
+"""
+
+TWO_GPUS = ["0, 35, 8192, 1024, 45", "1, 80, 24576, 20000, 71"]
+MISSING_FIELDS = ["0, [N/A], 8192, [Not Supported], 45", "1, 12, 4096", "Failed to initialize NVML: Driver Mismatch",
+                  "1, 12, 4096, 512, 50"]
+
+failures = []
+
+
+class WarningsHandler(logging.Handler):
+    # Keep the warnings logged meanwhile
+    def __init__(self):
+        super().__init__(logging.WARNING)
+        self.warnings = []
+
+    def emit(self, record: logging.LogRecord):
+        self.warnings.append(record.getMessage())
+
+
+def check(name: str, condition: bool):
+    print("%-70s %s" % (name, "PASS" if condition else "FAIL"))
+    if not condition:
+        failures.append(name)
+
+
+def same_stats(stats: NvidiaGpuStats, expected: tuple) -> bool:
+    # NaN values are equal here
+    return all((math.isnan(value) and math.isnan(expected_value)) or value == expected_value
+               for (value, expected_value) in zip(stats, expected))
+
+
+def fake_nvidia_smi(directory: str, name: str, lines: list, keep_running: bool = True, exit_code: int = 0) -> str:
+    path = os.path.join(directory, name)
+    with open(path, "wt") as stream:
+        stream.write(FAKE_NVIDIA_SMI % {"python": sys.executable, "args_file": path + ".args", "lines": lines,
+                                        "keep_running": keep_running, "exit_code": exit_code})
+    os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR)
+    return path
+
+
+def fake_args(command: str) -> str:
+    with open(command + ".args", "rt") as stream:
+        return stream.read()
+
+
+def check_parse_line():
+    check("parse_line: all values", parse_line("0, 35, 8192, 1024, 45") == NvidiaGpuStats(0, 35, 8192, 1024, 45))
+    check("parse_line: unavailable values are NaN",
+          same_stats(parse_line("1, [N/A], 8192, [Not Supported], 45"), (1, math.nan, 8192, math.nan, 45)))
+    check("parse_line: missing fields", parse_line("1, 12, 4096") is None)
+    check("parse_line: error message", parse_line("Failed to initialize NVML: Driver Mismatch") is None)
+    check("parse_line: invalid index", parse_line("GPU, 12, 4096, 512, 50") is None)
+
+
+def check_sampler(directory: str):
+    # Stats of all GPUs, sampled with the requested period
+    sampler = NvidiaSmiSampler(period=2.5, command=fake_nvidia_smi(directory, "two-gpus", TWO_GPUS))
+    check("sampler: stats available", sampler.wait_stats(timeout=5))
+    time.sleep(0.2)
+    check("sampler: stats of all GPUs",
+          sampler.stats() == [NvidiaGpuStats(0, 35, 8192, 1024, 45), NvidiaGpuStats(1, 80, 24576, 20000, 71)])
+    check("sampler: period given to nvidia-smi", fake_args(sampler.command).endswith("-lms 2500"))
+
+    # Changing the period starts nvidia-smi again
+    sampler.set_period(1)
+    sampler.wait_stats(timeout=5)
+    check("sampler: nvidia-smi restarted with new period", fake_args(sampler.command).endswith("-lms 1000"))
+    sampler.stop()
+    check("sampler: no stats once stopped", not sampler.is_running() and sampler.stats() == [])
+
+    # Unavailable values and malformed lines
+    sampler = NvidiaSmiSampler(command=fake_nvidia_smi(directory, "missing-fields", MISSING_FIELDS))
+    sampler.wait_stats(timeout=5)
+    time.sleep(0.2)
+    stats = sampler.stats()
+    check("sampler: malformed lines are ignored", len(stats) == 2)
+    check("sampler: unavailable values are NaN", len(stats) == 2 and
+          same_stats(stats[0], (0, math.nan, 8192, math.nan, 45)) and stats[1] == NvidiaGpuStats(1, 12, 4096, 512, 50))
+    sampler.stop()
+
+    # nvidia-smi stopping after printing stats: stats are no longer available
+    sampler = NvidiaSmiSampler(command=fake_nvidia_smi(directory, "exits", TWO_GPUS, keep_running=False, exit_code=1))
+    sampler.wait_stats(timeout=5)
+    end = time.monotonic() + 5
+    while sampler.is_running() and time.monotonic() < end:
+        time.sleep(0.05)
+    check("sampler: nvidia-smi exit detected", not sampler.is_running())
+    check("sampler: no stats after nvidia-smi exit", sampler.stats() == [])
+    sampler.stop()
+
+    # nvidia-smi stopping without stats (no Nvidia GPU): do not wait for the whole timeout
+    sampler = NvidiaSmiSampler(command=fake_nvidia_smi(directory, "no-gpu", ["No devices were found"],
+                                                       keep_running=False, exit_code=6))
+    start = time.monotonic()
+    available = sampler.wait_stats(timeout=5)
+    check("sampler: no GPU detected", not available and not sampler.is_running())
+    check("sampler: no GPU detected without waiting for timeout", time.monotonic() - start < 2)
+    sampler.stop()
+
+    # nvidia-smi not installed (e.g. no Nvidia GPU): this is not worth a warning, even when trying to start it again
+    warnings = WarningsHandler()
+    logger.addHandler(warnings)
+    sampler = NvidiaSmiSampler(command=os.path.join(directory, "not-installed"))
+    check("sampler: nvidia-smi not installed", not sampler.wait_stats(timeout=5) and sampler.stats() == [])
+    check("sampler: no warning if nvidia-smi not installed", warnings.warnings == [])
+    sampler.stop()
+
+    # nvidia-smi installed but cannot be started
+    not_executable = os.path.join(directory, "not-executable")
+    open(not_executable, "wt").close()
+    sampler = NvidiaSmiSampler(command=not_executable)
+    check("sampler: nvidia-smi cannot be started", not sampler.wait_stats(timeout=5))
+    check("sampler: warning if nvidia-smi cannot be started", len(warnings.warnings) == 1)
+    sampler.stop()
+    logger.removeHandler(warnings)
+
+
+if __name__ == "__main__":
+    check_parse_line()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        check_sampler(temp_dir)
+
+    if failures:
+        print("%d check(s) failed" % len(failures))
+        sys.exit(1)